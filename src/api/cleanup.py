@@ -0,0 +1,87 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+from utils.paths import UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Directories waiting for removal are moved here first
+TRASH_DIR = UPLOADS_DIR / ".trash"
+
+
+class DiskCleanupWorker:
+    """Background thread removing the on-disk data of deleted videos.
+
+    schedule() renames each directory into TRASH_DIR, which is instant and
+    frees its name for a new upload right away; the (possibly slow) recursive
+    removal then happens on the worker thread. Anything left in the trash by
+    a previous run is removed when the worker starts.
+    """
+
+    def __init__(self, trash_dir: Path = TRASH_DIR) -> None:
+        self.trash_dir = Path(trash_dir)
+        self._queue: "queue.Queue[Path]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        # Started on first use so importing the module has no side effects
+        with self._lock:
+            if self._thread is None:
+                self.trash_dir.mkdir(parents=True, exist_ok=True)
+                for leftover in self.trash_dir.iterdir():
+                    self._queue.put(leftover)
+                self._thread = threading.Thread(
+                    target=self._run, name="disk-cleanup", daemon=True)
+                self._thread.start()
+
+    def schedule(self, directories: Iterable[Path]) -> None:
+        """Move directories to the trash and queue them for removal.
+
+        Only directories directly inside UPLOADS_DIR are accepted; missing
+        directories are skipped.
+        """
+        self._start()
+        uploads_dir = UPLOADS_DIR.resolve()
+        for directory in map(Path, directories):
+            if directory.resolve().parent != uploads_dir or directory.name.startswith("."):
+                logger.warning(f"Refusing to remove {directory}: not a video directory")
+                continue
+            if not directory.exists():
+                continue
+            trashed = self.trash_dir / f"{directory.name}-{uuid.uuid4().hex}"
+            try:
+                os.replace(directory, trashed)
+            except OSError as e:
+                logger.error(f"Failed to move {directory} to the trash: {e}")
+                continue
+            self._queue.put(trashed)
+
+    def wait(self) -> None:
+        """Block until every scheduled directory has been removed."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            trashed = self._queue.get()
+            try:
+                if trashed.is_dir():
+                    shutil.rmtree(trashed)
+                else:
+                    trashed.unlink(missing_ok=True)
+                logger.info(f"Removed {trashed}")
+            except OSError as e:
+                logger.error(f"Failed to remove {trashed}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+# Create a singleton instance shared by the database API
+disk_cleanup = DiskCleanupWorker()
@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, TextIO, Union
+
+import numpy as np
+from pycocotools.mask import encode as encode_masks
+
+from utils.mask_archive import MaskArchiveReader
+from utils.paths import get_coco_export_path, get_mask_archive_path, get_video_path
+from .db import DatabaseAPI
+from .masks import mask_areas, mask_bboxes
+
+logger = logging.getLogger(__name__)
+
+# Compact separators keep exports of long videos noticeably smaller
+JSON_SEPARATORS = (",", ":")
+
+# Write buffer of the output file
+EXPORT_BUFFER_SIZE = 1 << 20
+
+
+def _write_array(f: TextIO, key: str, items: Iterable[Dict[str, Any]]) -> int:
+    """Write `,"key":[items]` one item at a time and return the item count."""
+    f.write(f',"{key}":[')
+    count = 0
+    for item in items:
+        if count:
+            f.write(",")
+        f.write(json.dumps(item, separators=JSON_SEPARATORS))
+        count += 1
+    f.write("]")
+    return count
+
+
+def export_coco(
+    video_id: int,
+    output_path: Optional[Union[str, Path]] = None,
+    include_empty: bool = False
+) -> Dict[str, Any]:
+    """Export the stored masks of a video as a COCO instance segmentation file.
+
+    Images are the extracted frames of the video (file names relative to the
+    video directory), categories are the objects of its project and
+    annotations come from the video's mask archive, one per object and frame
+    with an RLE segmentation whose area and bbox are computed on the RLE.
+    Frames and masks are streamed page by page and written as they are read,
+    so memory use does not grow with the number of annotations. The file is
+    written next to its destination and moved into place when complete.
+
+    Args:
+        video_id: Database ID of the video
+        output_path: Destination file (default: get_coco_export_path)
+        include_empty: Whether to keep annotations of empty masks
+
+    Returns:
+        Dict with path, images and annotations (counts)
+
+    Raises:
+        ValueError: If the video does not exist
+        FileNotFoundError: If no masks have been stored for the video
+    """
+    video = DatabaseAPI.get_video(video_id)
+    if video is None:
+        raise ValueError(f"Video {video_id} does not exist")
+    archive_path = get_mask_archive_path(video.name)
+    if not archive_path.exists():
+        raise FileNotFoundError(f"No stored masks for video {video_id}: {archive_path} does not exist")
+
+    output_path = Path(output_path) if output_path else get_coco_export_path(video.name)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+    video_dir = get_video_path(video.name)
+    categories = {obj.id: obj for obj in DatabaseAPI.get_objects_by_project(video.project_id)}
+
+    def images():
+        for frame_id, _, frame_idx, source_frame_number, pts, path, _ in \
+                DatabaseAPI.iter_frames_by_video(video_id, rows="tuples"):
+            yield {
+                "id": frame_id,
+                "file_name": os.path.relpath(path, video_dir),
+                "width": video.width,
+                "height": video.height,
+                "frame_idx": frame_idx,
+                "source_frame_number": source_frame_number,
+                "pts": pts,
+            }
+
+    def annotations(reader: MaskArchiveReader):
+        annotation_id = 0
+        for frame_id, _, frame_idx, *_ in DatabaseAPI.iter_frames_by_video(video_id, rows="tuples"):
+            masks = {object_id: mask for object_id, mask in reader.get_masks(frame_idx).items()
+                     if object_id in categories}
+            if not masks:
+                continue
+            # One encode call for all objects of the frame, then area and bbox on the RLEs
+            rles = encode_masks(np.asfortranarray(np.stack(list(masks.values()), axis=-1)))
+            for object_id, rle, area, bbox in zip(masks, rles, mask_areas(rles), mask_bboxes(rles)):
+                if not area and not include_empty:
+                    continue
+                annotation_id += 1
+                yield {
+                    "id": annotation_id,
+                    "image_id": frame_id,
+                    "category_id": object_id,
+                    "segmentation": {"size": rle["size"], "counts": rle["counts"].decode()},
+                    "area": int(area),
+                    "bbox": [float(value) for value in bbox],
+                    "iscrowd": 0,
+                }
+
+    try:
+        with MaskArchiveReader(archive_path) as reader, \
+                open(tmp_path, "w", buffering=EXPORT_BUFFER_SIZE) as f:
+            f.write('{"info":')
+            f.write(json.dumps({
+                "description": f"EasySAM export of {video.name}",
+                "video_id": video.id,
+                "fps": video.fps,
+                "date_created": datetime.now().isoformat(timespec="seconds"),
+            }, separators=JSON_SEPARATORS))
+            f.write(',"licenses":[]')
+            _write_array(f, "categories", (
+                {"id": obj.id, "name": obj.name, "supercategory": "object", "color": obj.color}
+                for obj in categories.values()
+            ))
+            image_count = _write_array(f, "images", images())
+            annotation_count = _write_array(f, "annotations", annotations(reader))
+            f.write("}")
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    logger.info(f"Exported {annotation_count} annotations on {image_count} frames of "
+                f"video {video_id} to {output_path}")
+    return {"path": output_path, "images": image_count, "annotations": annotation_count}
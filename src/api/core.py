@@ -1,7 +1,13 @@
 import logging
-from typing import Optional, List, Tuple, Dict, Any
-from .inference import InferenceAPI
+import time
+from typing import Optional, List, Tuple, Dict, Any, Generator
+from .inference import InferenceAPI, PREVIEW_MAX_WIDTH, preview_size
 from .db import DatabaseAPI
+from .writer import point_writer
+from db.models import ObjectPoint
+from utils.frames import get_extraction_job
+from utils.mask_archive import MaskArchiveWriter, DEFAULT_KEYFRAME_INTERVAL
+from utils.paths import get_mask_archive_path
 
 logger = logging.getLogger(__name__)
 
@@ -9,12 +15,18 @@ logger = logging.getLogger(__name__)
 class CoreAPI:
     """Core API class that integrates inference capabilities with database operations"""
 
-    def __init__(self, video_id: int, model_size: str = "base_plus"):
+    def __init__(self, video_id: int, model_size: str = "base_plus", restore_points: bool = True,
+                 write_behind: bool = False):
         """Initialize CoreAPI with a video and model configuration.
 
         Args:
             video_id: Database ID of the video to work with
             model_size: SAM2 model size ("tiny", "small", "base_plus", "large")
+            restore_points: Whether to replay the points stored for the video
+                into the new inference session
+            write_behind: Whether new points are written by the background
+                point writer instead of before inference; call flush() to wait
+                for them to reach the database
 
         Raises:
             ValueError: If video not found in database
@@ -22,6 +34,7 @@ class CoreAPI:
         """
         self.video_id = video_id
         self.model_size = model_size
+        self.write_behind = write_behind
 
         # Initialize database API
         self.db_api = DatabaseAPI()
@@ -34,11 +47,16 @@ class CoreAPI:
         # Initialize inference API
         self.inference_api = InferenceAPI(model_size)
 
-        # Start inference session with video frames
+        # Start inference session with video frames. While frames are still being
+        # extracted the session starts from the first frame and grows as they arrive.
         frame_directory = self._get_frame_directory()
+        extraction_job = get_extraction_job(frame_directory)
+        if extraction_job is not None and extraction_job.done:
+            extraction_job = None
 
         try:
-            self.session_id = self.inference_api.start_session(frame_directory)
+            self.session_id = self.inference_api.start_session(
+                frame_directory, frame_source=extraction_job)
             logger.info(
                 f"Started CoreAPI session {self.session_id} for video {video_id}")
         except Exception as e:
@@ -46,6 +64,54 @@ class CoreAPI:
                 f"Failed to start inference session for video {video_id}: {e}")
             raise RuntimeError(f"Failed to initialize inference session: {e}")
 
+        if restore_points:
+            self.restore_object_points()
+
+    def restore_object_points(self) -> int:
+        """Replay the points stored for the video into the inference session.
+
+        All points are loaded with one query and sent as one prompt per
+        (frame, object), in click order. Masks are not encoded while
+        replaying; they are computed when a frame is next requested.
+
+        Returns:
+            int: Number of points restored
+        """
+        started = time.perf_counter()
+        # Include points still queued by write-behind sessions
+        point_writer.flush()
+        stored_points = self.db_api.get_object_point_prompts(self.video_id)
+        if not stored_points:
+            return 0
+
+        groups: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for frame_idx, object_id, x, y, label_type in stored_points:
+            group = groups.setdefault((frame_idx, object_id), {
+                "frame_index": frame_idx,
+                "object_id": object_id,
+                "points": [],
+                "labels": [],
+            })
+            group["points"].append([x, y])
+            group["labels"].append(1 if label_type == "positive" else 0)
+
+        try:
+            self.inference_api.add_points_batch(
+                session_id=self.session_id,
+                prompts=list(groups.values()),
+                return_masks=False
+            )
+        except Exception as e:
+            logger.error(
+                f"Failed to restore {len(stored_points)} points into session {self.session_id}: {e}")
+            return 0
+
+        logger.info(
+            f"Restored {len(stored_points)} points in {len(groups)} prompts into session "
+            f"{self.session_id} in {time.perf_counter() - started:.2f}s"
+        )
+        return len(stored_points)
+
     def _get_frame_directory(self) -> str:
         """Get the frame directory path for the video.
 
@@ -54,8 +120,14 @@ class CoreAPI:
         """
         return self.video.frame_directory
 
+    def flush(self) -> None:
+        """Wait until every point queued in write-behind mode is in the database."""
+        point_writer.flush()
+
     def close(self):
         """Close the inference session and clean up resources."""
+        if self.write_behind:
+            self.flush()
         if hasattr(self, 'session_id'):
             success = self.inference_api.close_session(self.session_id)
             if success:
@@ -79,7 +151,8 @@ class CoreAPI:
         y: int,
         point_label_id: int,
         label: int = 1,
-        clear_old_points: bool = False
+        clear_old_points: bool = False,
+        output_size: Optional[Tuple[int, int]] = None
     ) -> Tuple[Optional[Any], Optional[Tuple[int, List[int], List[Dict[str, Any]]]]]:
         """Create a new object point in the database and add it to the inference session.
 
@@ -91,15 +164,23 @@ class CoreAPI:
             point_label_id: Database ID of the point label type
             label: Point label for inference (1 for positive, 0 for negative)
             clear_old_points: Whether to clear previous points in inference
+            output_size: (height, width) of the returned masks, e.g.
+                preview_size(); full video resolution by default
 
         Returns:
             Tuple of (db_object_point, inference_result) where:
-            - db_object_point: The created ObjectPoint database record or None if failed
+            - db_object_point: The created ObjectPoint database record or None if failed.
+              In write-behind mode it is an unsaved record (without ID) that the
+              background writer persists.
             - inference_result: Tuple of (frame_index, object_ids, masks_rle) or None if failed
 
         Raises:
             RuntimeError: If no active inference session
         """
+        if self.write_behind:
+            return self.__add_object_point_write_behind(
+                object_id, frame_idx, x, y, point_label_id, label, clear_old_points, output_size)
+
         # First, create the object point in the database
         db_object_point = self.db_api.create_object_point(
             object_id=object_id,
@@ -130,7 +211,8 @@ class CoreAPI:
                 object_id=object_id,
                 points=[[x, y]],
                 labels=[label],
-                clear_old_points=clear_old_points
+                clear_old_points=clear_old_points,
+                output_size=output_size
             )
 
             logger.info(
@@ -146,3 +228,207 @@ class CoreAPI:
                 f"Database object point {db_object_point.id} was created but inference failed."
             )
             return db_object_point, None
+
+    def __add_object_point_write_behind(
+        self,
+        object_id: int,
+        frame_idx: int,
+        x: int,
+        y: int,
+        point_label_id: int,
+        label: int,
+        clear_old_points: bool,
+        output_size: Optional[Tuple[int, int]]
+    ) -> Tuple[Any, Optional[Tuple[int, List[int], List[Dict[str, Any]]]]]:
+        """Queue the point for the background writer and run inference right away."""
+        point_writer.submit(self.video_id, {
+            "object_id": object_id,
+            "point_label_id": point_label_id,
+            "x": x,
+            "y": y,
+            "frame_idx": frame_idx,
+        })
+        pending_point = ObjectPoint(object=object_id, video=self.video_id,
+                                    point_label=point_label_id, x=x, y=y, frame_idx=frame_idx)
+
+        try:
+            inference_result = self.inference_api.add_points(
+                session_id=self.session_id,
+                frame_index=frame_idx,
+                object_id=object_id,
+                points=[[x, y]],
+                labels=[label],
+                clear_old_points=clear_old_points,
+                output_size=output_size
+            )
+            return pending_point, inference_result
+
+        except Exception as e:
+            logger.error(
+                f"Failed to add point to inference session {self.session_id}: {e}. "
+                f"The object point was queued for the database but inference failed."
+            )
+            return pending_point, None
+
+    def add_object_points(
+        self,
+        points: List[Dict[str, Any]],
+        clear_old_points: bool = False,
+        output_size: Optional[Tuple[int, int]] = None
+    ) -> Tuple[int, Optional[List[Tuple[int, List[int], List[Dict[str, Any]]]]]]:
+        """Persist a batch of object points and add them to the inference session.
+
+        Points are written with one bulk insert and sent to the predictor
+        grouped by (frame, object), so each object gets one update per frame
+        instead of one per point.
+
+        Args:
+            points: List of dicts with object_id, frame_idx, x, y,
+                point_label_id and label (1 for positive, 0 for negative)
+            clear_old_points: Whether each (frame, object) group replaces the
+                object's previous points on that frame
+            output_size: (height, width) of the returned masks, e.g.
+                preview_size(); full video resolution by default
+
+        Returns:
+            Tuple of (points_created, inference_results) where:
+            - points_created: Number of ObjectPoint records created (queued, in
+              write-behind mode)
+            - inference_results: List of (frame_index, object_ids, masks_rle),
+              one per frame, or None if inference failed
+        """
+        if not points:
+            return 0, []
+
+        if self.write_behind:
+            for point in points:
+                point_writer.submit(self.video_id, {
+                    key: point[key] for key in ("object_id", "point_label_id", "x", "y", "frame_idx")
+                })
+            points_created = len(points)
+        else:
+            try:
+                points_created = self.db_api.create_object_points_bulk(self.video_id, points)
+            except Exception as e:
+                logger.error(f"Failed to create {len(points)} object points in database: {e}")
+                return 0, None
+
+            logger.info(f"Created {points_created} object points in database for video {self.video_id}")
+
+        # Group in first-seen order so prompts on a frame keep their click order
+        groups: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for point in points:
+            key = (point["frame_idx"], point["object_id"])
+            group = groups.setdefault(key, {
+                "frame_index": point["frame_idx"],
+                "object_id": point["object_id"],
+                "points": [],
+                "labels": [],
+            })
+            group["points"].append([point["x"], point["y"]])
+            group["labels"].append(point["label"])
+
+        try:
+            inference_results = self.inference_api.add_points_batch(
+                session_id=self.session_id,
+                prompts=list(groups.values()),
+                clear_old_points=clear_old_points,
+                output_size=output_size
+            )
+
+            logger.info(
+                f"Added {len(points)} points in {len(groups)} prompts to inference "
+                f"session {self.session_id}"
+            )
+
+            return points_created, inference_results
+
+        except Exception as e:
+            logger.error(
+                f"Failed to add points to inference session {self.session_id}: {e}. "
+                f"{points_created} database object points were created but inference failed."
+            )
+            return points_created, None
+
+    def preview_size(self, max_width: int = PREVIEW_MAX_WIDTH) -> Tuple[int, int]:
+        """(height, width) of preview masks for the video, at most max_width wide."""
+        return preview_size(self.video.height, self.video.width, max_width)
+
+    def propagate_preview(
+        self,
+        start_frame_idx: int = 0,
+        propagation_direction: str = "both",
+        max_frame_num_to_track: Optional[int] = None,
+        max_width: int = PREVIEW_MAX_WIDTH
+    ) -> Generator[Tuple[int, List[int], List[Dict[str, Any]]], None, None]:
+        """Propagate the session's prompts through the video for display.
+
+        Masks are downscaled and thresholded on the inference device and
+        returned at preview_size(max_width); nothing is stored. Use
+        propagate_and_store for full resolution masks.
+
+        Args:
+            start_frame_idx: Frame index to start propagation from
+            propagation_direction: Direction to propagate ("both", "forward", "backward")
+            max_frame_num_to_track: Maximum number of frames to track
+            max_width: Largest width of the returned masks
+
+        Yields:
+            Tuple of (frame_index, object_ids, masks_rle) for each frame
+        """
+        yield from self.inference_api.propagate_in_video(
+            session_id=self.session_id,
+            start_frame_index=start_frame_idx,
+            propagation_direction=propagation_direction,
+            max_frame_num_to_track=max_frame_num_to_track,
+            output_size=self.preview_size(max_width)
+        )
+
+    def propagate_and_store(
+        self,
+        start_frame_idx: int = 0,
+        propagation_direction: str = "both",
+        max_frame_num_to_track: Optional[int] = None,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL
+    ) -> Generator[Tuple[int, List[int], List[Dict[str, Any]]], None, None]:
+        """Propagate the session's prompts through the video and store the masks.
+
+        Yields the same per-frame results as InferenceAPI.propagate_in_video
+        while writing every mask into the video's mask archive (see
+        utils.mask_archive). The archive replaces the previous one once
+        propagation finishes; if the caller stops iterating early or
+        propagation fails, the previous archive is kept.
+
+        Args:
+            start_frame_idx: Frame index to start propagation from
+            propagation_direction: Direction to propagate ("both", "forward", "backward")
+            max_frame_num_to_track: Maximum number of frames to track
+            keyframe_interval: Masks per object between two archive keyframes
+
+        Yields:
+            Tuple of (frame_index, object_ids, masks_rle) for each frame
+        """
+        archive_path = get_mask_archive_path(self.video.name)
+        writer: Optional[MaskArchiveWriter] = None
+        try:
+            for frame_idx, object_ids, masks_rle in self.inference_api.propagate_in_video(
+                session_id=self.session_id,
+                start_frame_index=start_frame_idx,
+                propagation_direction=propagation_direction,
+                max_frame_num_to_track=max_frame_num_to_track
+            ):
+                for object_mask in masks_rle:
+                    if writer is None:
+                        height, width = object_mask["mask"]["size"]
+                        writer = MaskArchiveWriter(archive_path, height, width, keyframe_interval)
+                    writer.add_rle(frame_idx, object_mask["object_id"], object_mask["mask"])
+                yield frame_idx, object_ids, masks_rle
+        except BaseException:
+            # Includes GeneratorExit when the caller stops iterating
+            if writer is not None:
+                writer.abort()
+            raise
+
+        if writer is not None:
+            writer.close()
+            logger.info(f"Stored propagated masks of video {self.video_id} in {archive_path}")
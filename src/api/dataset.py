@@ -0,0 +1,388 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.mask_archive import MaskArchiveReader
+from utils.paths import get_dataset_path, get_mask_archive_path, get_project_dataset_path
+from .db import DatabaseAPI
+from .yolo_export import CLASSES_FILE_NAME, replace_directory, write_yolo_labels
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of a built video changes, so every video is rebuilt
+DATASET_BUILD_VERSION = 1
+
+SPLITS = ("train", "val", "test")
+DEFAULT_VAL_FRACTION = 0.1
+DEFAULT_TEST_FRACTION = 0.1
+
+# Upper bound on the size of one tar shard
+SHARD_MAX_BYTES = 256 * 1024 * 1024
+
+# Label writer threads inside each video worker process
+DATASET_WRITE_WORKERS = 2
+
+MANIFEST_FILE_NAME = "manifest.json"
+DATA_YAML_FILE_NAME = "data.yaml"
+
+
+def assign_splits(video_ids: List[int], seed: int = 0, val_fraction: float = DEFAULT_VAL_FRACTION,
+                  test_fraction: float = DEFAULT_TEST_FRACTION) -> Dict[int, str]:
+    """Deterministic split of each video.
+
+    Whole videos go to one split, so near-identical neighbouring frames never
+    end up on both sides of a train/val boundary. Videos are ranked by a
+    seeded hash of their ID and the ranking is cut at the fractions, so the
+    assignment survives rebuilds and a new video only moves the videos next
+    to a cut. With at least 2 videos val gets one (and test too with at
+    least 3, when its fraction is not 0); train always keeps one.
+    """
+    def position(video_id: int) -> bytes:
+        return hashlib.sha256(f"{seed}:{video_id}".encode()).digest()
+
+    ranked = sorted(video_ids, key=position)
+    count = len(ranked)
+    test_count = round(count * test_fraction)
+    val_count = round(count * val_fraction)
+    if test_fraction > 0 and count >= 3:
+        test_count = max(test_count, 1)
+    if val_fraction > 0 and count >= 2:
+        val_count = max(val_count, 1)
+    # Leave at least one video for training, taking it from test first
+    excess = max(0, test_count + val_count - (count - 1))
+    test_count -= min(excess, test_count)
+    val_count = min(val_count, max(0, count - 1 - test_count))
+
+    splits = {}
+    for rank, video_id in enumerate(ranked):
+        if rank < test_count:
+            splits[video_id] = "test"
+        elif rank < test_count + val_count:
+            splits[video_id] = "val"
+        else:
+            splits[video_id] = "train"
+    return splits
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _hash_json(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, separators=(",", ":")).encode()).hexdigest()
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different file system (or no hard link support)
+        shutil.copy2(source, target)
+
+
+def build_video_dataset(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the dataset directory of one video.
+
+    Runs in a worker process and does not touch the database: everything it
+    needs is in the task (video_id, output_dir, archive_path, height, width,
+    class_indices and frames as (frame_idx, path) pairs). Frames that have
+    masks stored in the archive are hard linked into images/ and get a YOLO
+    label file in labels/ (empty when none of their masks is set); frames
+    that were never propagated are left out. The directory is built next to
+    output_dir and replaces it when complete.
+
+    Returns:
+        Dict with video_id, frames and boxes counts
+    """
+    output_dir = Path(task["output_dir"])
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    (tmp_dir / "images").mkdir(parents=True)
+    (tmp_dir / "labels").mkdir()
+    class_indices = task["class_indices"]
+    empty = np.zeros((0, task["height"], task["width"]), dtype=np.uint8)
+
+    def frames(reader: MaskArchiveReader):
+        stored = set(reader.frames())
+        for frame_idx, path in task["frames"]:
+            if frame_idx not in stored:
+                continue
+            path = Path(path)
+            _link_or_copy(path, tmp_dir / "images" / path.name)
+            masks = {object_id: mask for object_id, mask in reader.get_masks(frame_idx).items()
+                     if object_id in class_indices}
+            yield (
+                path.stem,
+                np.array([class_indices[object_id] for object_id in masks], dtype=np.int64),
+                np.stack(list(masks.values())) if masks else empty,
+            )
+
+    try:
+        with MaskArchiveReader(task["archive_path"]) as reader:
+            result = write_yolo_labels(frames(reader), tmp_dir / "labels", DATASET_WRITE_WORKERS)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    replace_directory(tmp_dir, output_dir)
+    return {"video_id": task["video_id"], **result}
+
+
+def _add_file(tar: tarfile.TarFile, path: Path, arcname: str) -> None:
+    # Always a regular member: tar.add() would store frames sharing an inode
+    # (duplicate frames linked to one cached file) as hard links to an
+    # earlier member, which sequential readers cannot resolve
+    stat = path.stat()
+    info = tarfile.TarInfo(arcname)
+    info.size = stat.st_size
+    info.mtime = int(stat.st_mtime)
+    with open(path, "rb") as f:
+        tar.addfile(info, f)
+
+
+def write_split_shards(split: str, sources: List[Tuple[int, str]], shard_dir: str,
+                       max_bytes: int = SHARD_MAX_BYTES) -> List[str]:
+    """Pack the images and labels of a split into tar shards.
+
+    Runs in a worker process. Samples are stored in video and frame order as
+    consecutive `<key>.png` / `<key>.txt` members (the WebDataset layout), in
+    uncompressed shards of at most max_bytes, so a training job reads each
+    shard sequentially. Existing shards of the split are replaced once all
+    new ones are written.
+
+    Args:
+        split: Split name, used as the shard file prefix
+        sources: (video_id, dataset directory) of the videos in the split
+        shard_dir: Directory for the shards
+        max_bytes: Size limit of one shard (a single larger sample still gets a shard)
+
+    Returns:
+        List of shard file names
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    names: List[str] = []
+    tar, written = None, 0
+    try:
+        for video_id, dataset_dir in sources:
+            labels_dir = Path(dataset_dir) / "labels"
+            for image in sorted((Path(dataset_dir) / "images").iterdir()):
+                label = labels_dir / f"{image.stem}.txt"
+                size = image.stat().st_size + label.stat().st_size + 2 * tarfile.BLOCKSIZE
+                if tar is None or (written and written + size > max_bytes):
+                    if tar is not None:
+                        tar.close()
+                    names.append(f"{split}-{len(names):05d}.tar")
+                    tar, written = tarfile.open(shard_dir / f"{names[-1]}.tmp", "w"), 0
+                # Dots would split the key of a WebDataset sample
+                key = f"v{video_id}_{image.stem.replace('.', '_')}"
+                _add_file(tar, image, f"{key}{image.suffix}")
+                _add_file(tar, label, f"{key}.txt")
+                written += size
+    except BaseException:
+        if tar is not None:
+            tar.close()
+        for name in names:
+            (shard_dir / f"{name}.tmp").unlink(missing_ok=True)
+        raise
+    if tar is not None:
+        tar.close()
+
+    for old_shard in shard_dir.glob(f"{split}-*.tar"):
+        old_shard.unlink()
+    for name in names:
+        os.replace(shard_dir / f"{name}.tmp", shard_dir / name)
+    return names
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("version") == DATASET_BUILD_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": DATASET_BUILD_VERSION, "videos": {}, "shards": {}}
+
+
+def _save_manifest(path: Path, manifest: Dict[str, Any]) -> None:
+    tmp_path = path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def build_project_dataset(
+    project_id: int,
+    workers: Optional[int] = None,
+    force: bool = False,
+    val_fraction: float = DEFAULT_VAL_FRACTION,
+    test_fraction: float = DEFAULT_TEST_FRACTION,
+    seed: int = 0,
+    shard_max_bytes: int = SHARD_MAX_BYTES
+) -> Dict[str, Any]:
+    """Build (or bring up to date) the YOLO detection dataset of a project.
+
+    Every video of the project with stored masks gets a dataset directory
+    (get_dataset_path) holding its annotated frames and their labels; videos
+    are built in parallel, one per worker process. The project dataset
+    directory (get_project_dataset_path) then gets train/val/test image lists,
+    data.yaml and classes.txt for training tools, and tar shards per split
+    under shards/.
+
+    A manifest records a hash of each video's inputs (frame paths and content
+    hashes, mask archive contents and the project's classes). On a rebuild
+    only videos whose hash changed are processed again, and only splits whose
+    videos changed are re-sharded.
+
+    Args:
+        project_id: Database ID of the project
+        workers: Worker processes (default: CPU count)
+        force: Rebuild every video and shard regardless of the manifest
+        val_fraction: Share of videos in the validation split
+        test_fraction: Share of videos in the test split
+        seed: Seed of the split assignment
+        shard_max_bytes: Size limit of one tar shard
+
+    Returns:
+        Dict with path, videos, rebuilt, failed, splits (videos per split)
+        and shards (file names per split)
+
+    Raises:
+        ValueError: If the project does not exist
+    """
+    if DatabaseAPI.get_project(project_id) is None:
+        raise ValueError(f"Project {project_id} does not exist")
+    dataset_dir = get_project_dataset_path(project_id)
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = dataset_dir / MANIFEST_FILE_NAME
+    manifest = _load_manifest(manifest_path)
+
+    objects = sorted(DatabaseAPI.get_objects_by_project(project_id), key=lambda obj: obj.id)
+    class_indices = {obj.id: index for index, obj in enumerate(objects)}
+    classes = [[obj.id, obj.name] for obj in objects]
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    # Manifest entries of the videos to rebuild, recorded once their build succeeds
+    pending: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, Dict[str, Any]] = {}
+    videos = [video for video in DatabaseAPI.iter_videos_by_project(project_id)
+              if get_mask_archive_path(video.name).exists()]
+    video_splits = assign_splits([video.id for video in videos], seed, val_fraction, test_fraction)
+    for video in videos:
+        archive_path = get_mask_archive_path(video.name)
+        frames = [(frame_idx, path, content_hash) for _, _, frame_idx, _, _, path, content_hash
+                  in DatabaseAPI.iter_frames_by_video(video.id, rows="tuples")]
+        output_dir = get_dataset_path(video.name)
+        key = str(video.id)
+        entry = {
+            "name": video.name,
+            "split": video_splits[video.id],
+            "hash": _hash_json([classes, _hash_file(archive_path), frames]),
+        }
+        previous = manifest["videos"].get(key)
+        if not force and previous and previous["hash"] == entry["hash"] and output_dir.exists():
+            entries[key] = {**previous, "split": entry["split"]}
+            continue
+        # Until the new build succeeds the previous one, if any, stays in the manifest
+        if previous and output_dir.exists():
+            entries[key] = previous
+        pending[key] = entry
+        tasks[key] = {
+            "video_id": video.id,
+            "output_dir": str(output_dir),
+            "archive_path": str(archive_path),
+            "height": video.height,
+            "width": video.width,
+            "class_indices": class_indices,
+            "frames": [(frame_idx, path) for frame_idx, path, _ in frames],
+        }
+
+    rebuilt = failed = 0
+    shards: Dict[str, List[str]] = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(build_video_dataset, task): key for key, task in tasks.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Failed to build the dataset of video {key}: {e}")
+                    # Keep the previous build, if any, and retry on the next run
+                    if key in entries:
+                        entries[key] = {**entries[key], "hash": None}
+                    continue
+                entries[key] = {**pending[key], "frames": result["frames"], "boxes": result["boxes"]}
+                rebuilt += 1
+                logger.info(f"Built the dataset of video {key}: {result['frames']} frames")
+
+            shard_futures = {}
+            for split in SPLITS:
+                members = sorted((int(key), entry) for key, entry in entries.items()
+                                 if entry["split"] == split)
+                shard_hash = _hash_json([[video_id, entry["hash"]] for video_id, entry in members]
+                                        + [shard_max_bytes])
+                previous = manifest["shards"].get(split)
+                if (not force and previous and previous["hash"] == shard_hash
+                        and all((dataset_dir / "shards" / name).exists() for name in previous["files"])):
+                    shards[split] = previous["files"]
+                    continue
+                sources = [(video_id, str(get_dataset_path(entry["name"]))) for video_id, entry in members]
+                future = pool.submit(write_split_shards, split, sources,
+                                     str(dataset_dir / "shards"), shard_max_bytes)
+                shard_futures[future] = (split, shard_hash)
+            for future in as_completed(shard_futures):
+                split, shard_hash = shard_futures[future]
+                try:
+                    shards[split] = future.result()
+                    manifest["shards"][split] = {"hash": shard_hash, "files": shards[split]}
+                except Exception as e:
+                    failed += 1
+                    manifest["shards"].pop(split, None)
+                    logger.error(f"Failed to write the {split} shards: {e}")
+    finally:
+        manifest["videos"] = entries
+        _save_manifest(manifest_path, manifest)
+
+    _write_split_lists(dataset_dir, entries, objects)
+    splits = {split: sum(entry["split"] == split for entry in entries.values()) for split in SPLITS}
+    logger.info(f"Built the dataset of project {project_id} in {dataset_dir}: "
+                f"{rebuilt} of {len(entries)} videos rebuilt, {failed} failures")
+    return {"path": dataset_dir, "videos": len(entries), "rebuilt": rebuilt,
+            "failed": failed, "splits": splits, "shards": shards}
+
+
+def _write_split_lists(dataset_dir: Path, entries: Dict[str, Dict[str, Any]],
+                       objects: List[Any]) -> None:
+    """Write <split>.txt image lists, data.yaml and classes.txt."""
+    for split in SPLITS:
+        images: List[str] = []
+        for _, entry in sorted((int(key), entry) for key, entry in entries.items()
+                               if entry["split"] == split):
+            images_dir = get_dataset_path(entry["name"]) / "images"
+            images.extend(str(image) for image in sorted(images_dir.iterdir()))
+        with open(dataset_dir / f"{split}.txt", "w") as f:
+            f.write("".join(f"{image}\n" for image in images))
+
+    with open(dataset_dir / CLASSES_FILE_NAME, "w") as f:
+        f.write("".join(f"{obj.name}\n" for obj in objects))
+    # JSON strings are valid YAML scalars, which saves depending on a YAML library
+    lines = [f"path: {json.dumps(str(dataset_dir))}"]
+    lines += [f"{split}: {split}.txt" for split in SPLITS]
+    lines += ["names:"] + [f"  {index}: {json.dumps(obj.name)}" for index, obj in enumerate(objects)]
+    with open(dataset_dir / DATA_YAML_FILE_NAME, "w") as f:
+        f.write("\n".join(lines) + "\n")
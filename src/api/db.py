@@ -1,10 +1,123 @@
-from typing import List, Optional, Dict, Any
-from peewee import DoesNotExist, IntegrityError
-from ..db.session import get_db_session
-from ..db.models import (
+from typing import List, Optional, Dict, Any, Tuple, Iterator, Sequence, Union
+import numpy as np
+from peewee import DoesNotExist, IntegrityError, JOIN, chunked, fn, Field, FloatField, IntegerField, ForeignKeyField, Tuple as RowValue
+from db.session import get_db_session
+from db.models import (
     Project, VideoTypes, Videos, VideoInference,
-    Object, PointLabel, ObjectPoint
+    Frame, Object, PointLabel, ObjectPoint
 )
+from utils.paths import get_video_path
+from .cache import LookupCache
+from .cleanup import disk_cleanup
+
+# Rows per INSERT statement for bulk inserts, well below SQLite's variable limit
+BULK_INSERT_BATCH_SIZE = 500
+
+# Read-through caches for small reference tables and hot single-row lookups,
+# invalidated by the DatabaseAPI methods that change the cached rows
+_reference_cache = LookupCache("reference", maxsize=64, ttl=3600)
+_video_cache = LookupCache("videos", maxsize=256, ttl=300)
+_object_cache = LookupCache("objects", maxsize=1024, ttl=300)
+
+# Rows fetched per query by the iter_* methods
+ITER_PAGE_SIZE = 5000
+
+# Row shapes the iter_* methods can yield: model instances, plain tuples in
+# field order, or one NumPy structured array per page
+ITER_ROW_TYPES = ("models", "tuples", "numpy")
+
+
+def _not_rendered():
+    """Condition on Videos leaving out videos rendered from another video
+    (overlays), which are not annotated and have no extracted frames."""
+    return ~fn.EXISTS(VideoInference.select().where(VideoInference.inference_video == Videos.id))
+
+
+def _delete_video_rows(video_ids) -> List[str]:
+    """Delete the videos selected by a subquery and every row that references them.
+
+    Must run inside a transaction. Returns the names of the deleted videos.
+    """
+    video_names = [name for name, in Videos.select(Videos.name).where(Videos.id.in_(video_ids)).tuples()]
+    if not video_names:
+        return []
+    ObjectPoint.delete().where(ObjectPoint.video.in_(video_ids)).execute()
+    Frame.delete().where(Frame.video.in_(video_ids)).execute()
+    VideoInference.delete().where(
+        VideoInference.source_video.in_(video_ids) | VideoInference.inference_video.in_(video_ids)
+    ).execute()
+    Videos.delete().where(Videos.id.in_(video_ids)).execute()
+    return video_names
+
+
+def _iter_keyset(model, conditions: Sequence[Any], key_fields: Sequence[Field],
+                 page_size: int, rows: str) -> Iterator[Any]:
+    """Page through a query with keyset pagination on key_fields.
+
+    Each page is one short query (`WHERE key > last_key ORDER BY key LIMIT n`)
+    in its own session, so memory and lock time stay constant however many
+    rows match. key_fields must be unique together and, for speed, follow an
+    index that starts with the equality conditions. Tuples and arrays hold
+    the raw column values (foreign keys as IDs, timestamps as stored text).
+    """
+    if rows not in ITER_ROW_TYPES:
+        raise ValueError(f"rows must be one of {ITER_ROW_TYPES}, not {rows!r}")
+    fields = model._meta.sorted_fields
+    # Fields overload ==, so positions are found by name rather than list.index
+    field_names = [field.name for field in fields]
+    key_positions = [field_names.index(field.name) for field in key_fields]
+    dtype = _numpy_dtype(fields) if rows == "numpy" else None
+
+    last_key = None
+    while True:
+        query = model.select(*fields)
+        if conditions:
+            query = query.where(*conditions)
+        if last_key is not None:
+            if len(key_fields) == 1:
+                query = query.where(key_fields[0] > last_key[0])
+            else:
+                query = query.where(RowValue(*key_fields) > RowValue(*last_key))
+        query = query.order_by(*key_fields).limit(page_size)
+
+        with get_db_session() as db:
+            if rows == "models":
+                page = list(query)
+            else:
+                # Read the cursor directly; peewee's per-column converters
+                # would cost more than the query itself
+                page = db.execute_sql(*query.sql()).fetchall()
+        if not page:
+            return
+
+        if rows == "models":
+            last_key = tuple(page[-1].__data__[field.name] for field in key_fields)
+            yield from page
+        else:
+            last_key = tuple(page[-1][position] for position in key_positions)
+            if rows == "numpy":
+                yield np.array(page, dtype=dtype)
+            else:
+                yield from page
+        if len(page) < page_size:
+            return
+
+
+def _numpy_dtype(fields: Sequence[Field]) -> np.dtype:
+    """Structured dtype for rows of the given fields (ids and integers as int64)."""
+    def field_dtype(field: Field) -> Union[str, type]:
+        if isinstance(field, (IntegerField, ForeignKeyField)):
+            return "i8"
+        if isinstance(field, FloatField):
+            return "f8"
+        return object
+    return np.dtype([(field.name, field_dtype(field)) for field in fields])
+
+
+def _unused_video_names(video_names: List[str]) -> List[str]:
+    """Names no remaining video uses, so their directories can be removed."""
+    in_use = {name for name, in Videos.select(Videos.name).where(Videos.name.in_(video_names)).tuples()}
+    return sorted(set(video_names) - in_use)
 
 
 class DatabaseAPI:
@@ -26,6 +139,15 @@ class DatabaseAPI:
             except DoesNotExist:
                 return None
 
+    @staticmethod
+    def get_or_create_project(name: str) -> Project:
+        """Get the first project with a name, creating it if missing"""
+        with get_db_session():
+            project = Project.get_or_none(Project.name == name)
+            if project is None:
+                project = Project.create(name=name)
+            return project
+
     @staticmethod
     def get_all_projects() -> List[Project]:
         """Get all projects"""
@@ -45,15 +167,29 @@ class DatabaseAPI:
                 return False
 
     @staticmethod
-    def delete_project(project_id: int) -> bool:
-        """Delete a project"""
-        with get_db_session():
-            try:
-                project = Project.get_by_id(project_id)
-                project.delete_instance(recursive=True)
-                return True
-            except DoesNotExist:
-                return False
+    def delete_project(project_id: int, remove_files: bool = True) -> bool:
+        """Delete a project with its videos, objects and points.
+
+        Runs a handful of set-based DELETEs in one transaction. With
+        remove_files=True the directories of the deleted videos are removed
+        from disk by the background cleanup worker.
+        """
+        with get_db_session() as db:
+            with db.atomic():
+                if Project.get_or_none(Project.id == project_id) is None:
+                    return False
+                video_ids = Videos.select(Videos.id).where(Videos.project == project_id)
+                object_ids = Object.select(Object.id).where(Object.project == project_id)
+                video_names = _delete_video_rows(video_ids)
+                ObjectPoint.delete().where(ObjectPoint.object.in_(object_ids)).execute()
+                Object.delete().where(Object.project == project_id).execute()
+                Project.delete().where(Project.id == project_id).execute()
+                orphaned_names = _unused_video_names(video_names)
+        _video_cache.clear()
+        _object_cache.clear()
+        if remove_files:
+            disk_cleanup.schedule(get_video_path(name) for name in orphaned_names)
+        return True
 
     # VideoTypes CRUD operations
     @staticmethod
@@ -64,21 +200,27 @@ class DatabaseAPI:
                 return VideoTypes.create(type=type_name)
             except IntegrityError:
                 return None
+            finally:
+                _reference_cache.clear()
 
     @staticmethod
     def get_video_type(type_id: int) -> Optional[VideoTypes]:
-        """Get a video type by ID"""
-        with get_db_session():
-            try:
-                return VideoTypes.get_by_id(type_id)
-            except DoesNotExist:
-                return None
+        """Get a video type by ID (cached)"""
+        def load():
+            with get_db_session():
+                try:
+                    return VideoTypes.get_by_id(type_id)
+                except DoesNotExist:
+                    return None
+        return _reference_cache.get(('video_type', type_id), load)
 
     @staticmethod
     def get_all_video_types() -> List[VideoTypes]:
-        """Get all video types"""
-        with get_db_session():
-            return list(VideoTypes.select())
+        """Get all video types (cached)"""
+        def load():
+            with get_db_session():
+                return list(VideoTypes.select())
+        return list(_reference_cache.get('video_types', load))
 
     @staticmethod
     def delete_video_type(type_id: int) -> bool:
@@ -90,6 +232,8 @@ class DatabaseAPI:
                 return True
             except DoesNotExist:
                 return False
+            finally:
+                _reference_cache.clear()
 
     # Videos CRUD operations
     @staticmethod
@@ -111,20 +255,58 @@ class DatabaseAPI:
             except IntegrityError:
                 return None
 
+    @staticmethod
+    def create_videos_bulk(videos: List[Dict[str, Any]]) -> List[Videos]:
+        """Create several videos in one transaction.
+
+        Each video is a dict with the create_video arguments (project_id, name,
+        file_path, frame_directory, width, height, fps, duration). Either all
+        videos are created or, on an integrity error, none are.
+
+        Returns:
+            List[Videos]: The created videos, in input order; empty on failure
+        """
+        with get_db_session() as db:
+            try:
+                with db.atomic():
+                    # Rows are created one by one (inside one commit) because
+                    # SQLite's insert_many does not return the new primary keys
+                    return [
+                        Videos.create(project=video['project_id'],
+                                      **{k: v for k, v in video.items() if k != 'project_id'})
+                        for video in videos
+                    ]
+            except IntegrityError:
+                return []
+
     @staticmethod
     def get_video(video_id: int) -> Optional[Videos]:
-        """Get a video by ID"""
+        """Get a video by ID (cached)"""
+        def load():
+            with get_db_session():
+                try:
+                    return Videos.get_by_id(video_id)
+                except DoesNotExist:
+                    return None
+        return _video_cache.get(video_id, load)
+
+    @staticmethod
+    def get_video_by_file_path(file_path: str) -> Optional[Videos]:
+        """Get the first video registered for a file path"""
         with get_db_session():
-            try:
-                return Videos.get_by_id(video_id)
-            except DoesNotExist:
-                return None
+            return Videos.get_or_none(Videos.file_path == file_path)
+
+    @staticmethod
+    def get_video_by_name(name: str) -> Optional[Videos]:
+        """Get the first video with a name"""
+        with get_db_session():
+            return Videos.get_or_none(Videos.name == name)
 
     @staticmethod
     def get_videos_by_project(project_id: int) -> List[Videos]:
-        """Get all videos for a project"""
+        """Get the videos of a project, without the videos rendered from them"""
         with get_db_session():
-            return list(Videos.select().where(Videos.project == project_id))
+            return list(Videos.select().where(Videos.project == project_id, _not_rendered()))
 
     @staticmethod
     def get_all_videos() -> List[Videos]:
@@ -132,6 +314,23 @@ class DatabaseAPI:
         with get_db_session():
             return list(Videos.select())
 
+    @staticmethod
+    def iter_videos_by_project(project_id: int, page_size: int = ITER_PAGE_SIZE,
+                               rows: str = "models") -> Iterator[Any]:
+        """Stream the videos of a project in ID order, one page per query.
+
+        Videos rendered from another video are left out. rows selects what is
+        yielded: "models" (Videos instances), "tuples" (field values in model
+        order) or "numpy" (one structured array per page).
+        """
+        return _iter_keyset(Videos, [Videos.project == project_id, _not_rendered()],
+                            [Videos.id], page_size, rows)
+
+    @staticmethod
+    def iter_all_videos(page_size: int = ITER_PAGE_SIZE, rows: str = "models") -> Iterator[Any]:
+        """Stream all videos in ID order; see iter_videos_by_project for rows"""
+        return _iter_keyset(Videos, [], [Videos.id], page_size, rows)
+
     @staticmethod
     def update_video(video_id: int, **kwargs) -> bool:
         """Update a video with provided fields"""
@@ -145,17 +344,28 @@ class DatabaseAPI:
                 return True
             except DoesNotExist:
                 return False
+            finally:
+                _video_cache.invalidate(video_id)
 
     @staticmethod
-    def delete_video(video_id: int) -> bool:
-        """Delete a video"""
-        with get_db_session():
-            try:
-                video = Videos.get_by_id(video_id)
-                video.delete_instance(recursive=True)
-                return True
-            except DoesNotExist:
-                return False
+    def delete_video(video_id: int, remove_files: bool = True) -> bool:
+        """Delete a video with its frames, points and inference links.
+
+        Runs set-based DELETEs in one transaction. With remove_files=True the
+        video's directory is removed from disk by the background cleanup
+        worker, unless another video still uses the same name.
+        """
+        with get_db_session() as db:
+            with db.atomic():
+                video_ids = Videos.select(Videos.id).where(Videos.id == video_id)
+                video_names = _delete_video_rows(video_ids)
+                if not video_names:
+                    return False
+                orphaned_names = _unused_video_names(video_names)
+        _video_cache.invalidate(video_id)
+        if remove_files:
+            disk_cleanup.schedule(get_video_path(name) for name in orphaned_names)
+        return True
 
     # VideoInference CRUD operations
     @staticmethod
@@ -171,6 +381,33 @@ class DatabaseAPI:
             except IntegrityError:
                 return None
 
+    @staticmethod
+    def create_inference_video(source_video_id: int, model: str, name: str, file_path: str,
+                               frame_directory: str, width: int, height: int, fps: float,
+                               duration: float) -> Optional[Videos]:
+        """Register a video rendered from a source video, with its VideoInference link,
+        in one transaction. The video joins the project of the source video."""
+        source = DatabaseAPI.get_video(source_video_id)
+        if source is None:
+            return None
+        with get_db_session() as db:
+            try:
+                with db.atomic():
+                    video = Videos.create(
+                        project=source.project_id,
+                        name=name,
+                        file_path=file_path,
+                        frame_directory=frame_directory,
+                        width=width,
+                        height=height,
+                        fps=fps,
+                        duration=duration
+                    )
+                    VideoInference.create(source_video=source_video_id, inference_video=video.id, model=model)
+                return video
+            except IntegrityError:
+                return None
+
     @staticmethod
     def get_video_inference(source_video_id: int, inference_video_id: int) -> Optional[VideoInference]:
         """Get a video inference record"""
@@ -203,6 +440,76 @@ class DatabaseAPI:
             except DoesNotExist:
                 return False
 
+    # Frame CRUD operations
+    @staticmethod
+    def create_frames_bulk(video_id: int, frames: List[Dict[str, Any]], replace: bool = True) -> int:
+        """Insert the extracted frames of a video in one transaction.
+
+        Each frame is a dict with frame_idx, source_frame_number, pts, path and
+        content_hash, as returned by utils.frames.frame_records. With replace=True
+        the frames previously registered for the video are removed first.
+
+        Returns:
+            int: Number of frames inserted
+        """
+        rows = [{**frame, 'video': video_id} for frame in frames]
+        with get_db_session() as db:
+            with db.atomic():
+                if replace:
+                    Frame.delete().where(Frame.video == video_id).execute()
+                for batch in chunked(rows, BULK_INSERT_BATCH_SIZE):
+                    Frame.insert_many(batch).execute()
+        return len(rows)
+
+    @staticmethod
+    def get_frame(video_id: int, frame_idx: int) -> Optional[Frame]:
+        """Get the frame of a video at a session frame index"""
+        with get_db_session():
+            try:
+                return Frame.get(Frame.video == video_id, Frame.frame_idx == frame_idx)
+            except DoesNotExist:
+                return None
+
+    @staticmethod
+    def get_frame_by_source_number(video_id: int, source_frame_number: int) -> Optional[Frame]:
+        """Get the frame of a video extracted from a source frame number"""
+        with get_db_session():
+            try:
+                return Frame.get(Frame.video == video_id,
+                                 Frame.source_frame_number == source_frame_number)
+            except DoesNotExist:
+                return None
+
+    @staticmethod
+    def get_frames_by_video(video_id: int) -> List[Frame]:
+        """Get all frames of a video ordered by frame index"""
+        with get_db_session():
+            return list(Frame.select().where(Frame.video == video_id).order_by(Frame.frame_idx))
+
+    @staticmethod
+    def get_frames_in_range(video_id: int, start_idx: int, stop_idx: int) -> List[Frame]:
+        """Get the frames of a video with start_idx <= frame_idx < stop_idx, ordered by frame index"""
+        with get_db_session():
+            return list(Frame.select()
+                        .where((Frame.video == video_id) & (Frame.frame_idx >= start_idx)
+                               & (Frame.frame_idx < stop_idx))
+                        .order_by(Frame.frame_idx))
+
+    @staticmethod
+    def iter_frames_by_video(video_id: int, page_size: int = ITER_PAGE_SIZE,
+                             rows: str = "models") -> Iterator[Any]:
+        """Stream the frames of a video ordered by frame index, one page per query
+        along the (video, frame_idx) index; tuples hold (id, video, frame_idx,
+        source_frame_number, pts, path, content_hash). See
+        iter_object_points_by_video for rows"""
+        return _iter_keyset(Frame, [Frame.video == video_id], [Frame.frame_idx], page_size, rows)
+
+    @staticmethod
+    def delete_frames_by_video(video_id: int) -> int:
+        """Delete all frames of a video"""
+        with get_db_session():
+            return Frame.delete().where(Frame.video == video_id).execute()
+
     # Object CRUD operations
     @staticmethod
     def create_object(project_id: int, name: str, color: str) -> Optional[Object]:
@@ -212,21 +519,27 @@ class DatabaseAPI:
                 return Object.create(project=project_id, name=name, color=color)
             except IntegrityError:
                 return None
+            finally:
+                _object_cache.invalidate(('project', project_id))
 
     @staticmethod
     def get_object(object_id: int) -> Optional[Object]:
-        """Get an object by ID"""
-        with get_db_session():
-            try:
-                return Object.get_by_id(object_id)
-            except DoesNotExist:
-                return None
+        """Get an object by ID (cached)"""
+        def load():
+            with get_db_session():
+                try:
+                    return Object.get_by_id(object_id)
+                except DoesNotExist:
+                    return None
+        return _object_cache.get(('object', object_id), load)
 
     @staticmethod
     def get_objects_by_project(project_id: int) -> List[Object]:
-        """Get all objects for a project"""
-        with get_db_session():
-            return list(Object.select().where(Object.project == project_id))
+        """Get all objects for a project (cached)"""
+        def load():
+            with get_db_session():
+                return list(Object.select().where(Object.project == project_id))
+        return list(_object_cache.get(('project', project_id), load))
 
     @staticmethod
     def update_object(object_id: int, name: str = None, color: str = None) -> bool:
@@ -242,6 +555,9 @@ class DatabaseAPI:
                 return True
             except DoesNotExist:
                 return False
+            finally:
+                # Also drops the per-project lists holding the object
+                _object_cache.clear()
 
     @staticmethod
     def delete_object(object_id: int) -> bool:
@@ -253,6 +569,8 @@ class DatabaseAPI:
                 return True
             except DoesNotExist:
                 return False
+            finally:
+                _object_cache.clear()
 
     # PointLabel CRUD operations
     @staticmethod
@@ -263,21 +581,27 @@ class DatabaseAPI:
                 return PointLabel.create(type=type_name)
             except IntegrityError:
                 return None
+            finally:
+                _reference_cache.clear()
 
     @staticmethod
     def get_point_label(label_id: int) -> Optional[PointLabel]:
-        """Get a point label by ID"""
-        with get_db_session():
-            try:
-                return PointLabel.get_by_id(label_id)
-            except DoesNotExist:
-                return None
+        """Get a point label by ID (cached)"""
+        def load():
+            with get_db_session():
+                try:
+                    return PointLabel.get_by_id(label_id)
+                except DoesNotExist:
+                    return None
+        return _reference_cache.get(('point_label', label_id), load)
 
     @staticmethod
     def get_all_point_labels() -> List[PointLabel]:
-        """Get all point labels"""
-        with get_db_session():
-            return list(PointLabel.select())
+        """Get all point labels (cached)"""
+        def load():
+            with get_db_session():
+                return list(PointLabel.select())
+        return list(_reference_cache.get('point_labels', load))
 
     @staticmethod
     def delete_point_label(label_id: int) -> bool:
@@ -289,6 +613,8 @@ class DatabaseAPI:
                 return True
             except DoesNotExist:
                 return False
+            finally:
+                _reference_cache.clear()
 
     # ObjectPoint CRUD operations
     @staticmethod
@@ -328,6 +654,29 @@ class DatabaseAPI:
         with get_db_session():
             return list(ObjectPoint.select().where(ObjectPoint.video == video_id))
 
+    @staticmethod
+    def iter_object_points_by_video(video_id: int, page_size: int = ITER_PAGE_SIZE,
+                                    rows: str = "models") -> Iterator[Any]:
+        """Stream the points of a video ordered by frame and creation, one page per query.
+
+        Pages follow the (video, frame_idx) index, so each query is a range
+        read however far into the video it is. rows selects what is yielded:
+        "models" (ObjectPoint instances), "tuples" (id, object, video,
+        point_label, x, y, frame_idx) or "numpy" (one structured array with
+        those fields per page).
+        """
+        return _iter_keyset(ObjectPoint, [ObjectPoint.video == video_id],
+                            [ObjectPoint.frame_idx, ObjectPoint.id], page_size, rows)
+
+    @staticmethod
+    def iter_object_points_by_object(object_id: int, page_size: int = ITER_PAGE_SIZE,
+                                     rows: str = "models") -> Iterator[Any]:
+        """Stream the points of an object ordered by video and creation, one page
+        per query along the (object, video) index; see iter_object_points_by_video
+        for rows"""
+        return _iter_keyset(ObjectPoint, [ObjectPoint.object == object_id],
+                            [ObjectPoint.video, ObjectPoint.id], page_size, rows)
+
     @staticmethod
     def get_object_points_by_frame_idx(video_id: int, frame_idx: int) -> List[ObjectPoint]:
         """Get all object points for a video at a specific frame index"""
@@ -360,33 +709,184 @@ class DatabaseAPI:
             except DoesNotExist:
                 return False
 
+    @staticmethod
+    def get_object_point_prompts(video_id: int) -> List[Tuple[int, int, int, int, str]]:
+        """Get all points of a video for replaying them into an inference session.
+
+        One query on the (video, frame_idx) index, joined with the point label.
+
+        Returns:
+            List of (frame_idx, object_id, x, y, label_type) tuples ordered by
+            frame and then by creation
+        """
+        with get_db_session():
+            return list(
+                ObjectPoint
+                .select(ObjectPoint.frame_idx, ObjectPoint.object, ObjectPoint.x,
+                        ObjectPoint.y, PointLabel.type)
+                .join(PointLabel)
+                .where(ObjectPoint.video == video_id)
+                .order_by(ObjectPoint.frame_idx, ObjectPoint.id)
+                .tuples()
+            )
+
+    @staticmethod
+    def create_object_points_bulk(video_id: int, points: List[Dict[str, Any]]) -> int:
+        """Insert many object points of a video, one transaction per batch.
+
+        Each point is a dict with object_id, point_label_id, x, y and frame_idx.
+        Committing per batch keeps the write lock short, so large imports do
+        not stall clicks from the labelling page. Each batch checks in its
+        transaction that the video and objects still exist, since foreign
+        keys are not enforced and points queued by the write-behind writer
+        can arrive after a delete.
+
+        Returns:
+            int: Number of points inserted
+
+        Raises:
+            ValueError: If the video or one of the objects does not exist
+        """
+        rows = [
+            {
+                'object': point['object_id'],
+                'video': video_id,
+                'point_label': point['point_label_id'],
+                'x': point['x'],
+                'y': point['y'],
+                'frame_idx': point['frame_idx'],
+            }
+            for point in points
+        ]
+        with get_db_session() as db:
+            for batch in chunked(rows, BULK_INSERT_BATCH_SIZE):
+                object_ids = {row['object'] for row in batch}
+                with db.atomic():
+                    if not Videos.select().where(Videos.id == video_id).exists():
+                        raise ValueError(f"Video {video_id} does not exist")
+                    if Object.select().where(Object.id.in_(object_ids)).count() != len(object_ids):
+                        raise ValueError(f"Objects of video {video_id} do not exist")
+                    ObjectPoint.insert_many(batch).execute()
+        return len(rows)
+
+    @staticmethod
+    def delete_object_points(video_id: int, object_id: Optional[int] = None,
+                             start_frame: Optional[int] = None, end_frame: Optional[int] = None) -> int:
+        """Delete the points of a video, optionally only for one object and a
+        frame range (both bounds inclusive).
+
+        Returns:
+            int: Number of points deleted
+        """
+        conditions = [ObjectPoint.video == video_id]
+        if object_id is not None:
+            conditions.append(ObjectPoint.object == object_id)
+        if start_frame is not None:
+            conditions.append(ObjectPoint.frame_idx >= start_frame)
+        if end_frame is not None:
+            conditions.append(ObjectPoint.frame_idx <= end_frame)
+        with get_db_session():
+            return ObjectPoint.delete().where(*conditions).execute()
+
     # Utility methods
+    @staticmethod
+    def cache_stats() -> Dict[str, Dict[str, Any]]:
+        """Get hit/miss counters and sizes of the lookup caches"""
+        return {cache.name: cache.stats() for cache in (_reference_cache, _video_cache, _object_cache)}
+
+    @staticmethod
+    def clear_caches() -> None:
+        """Drop every cached lookup, e.g. after changing the database outside DatabaseAPI"""
+        for cache in (_reference_cache, _video_cache, _object_cache):
+            cache.clear()
+
     @staticmethod
     def initialize_database():
-        """Initialize the database by creating all tables"""
-        from ..db.models import Project, VideoTypes, Videos, VideoInference, Object, PointLabel, ObjectPoint
-        with get_db_session() as db:
-            db.create_tables([
-                Project, VideoTypes, Videos, VideoInference,
-                Object, PointLabel, ObjectPoint
-            ], safe=True)
+        """Initialize the database by creating all tables and indexes"""
+        from db.migrations import migrate_database
+        migrate_database()
 
     @staticmethod
     def get_project_summary(project_id: int) -> Optional[Dict[str, Any]]:
         """Get a summary of a project including counts of related objects"""
-        with get_db_session():
-            try:
-                project = Project.get_by_id(project_id)
-                videos_count = Videos.select().where(Videos.project == project_id).count()
-                objects_count = Object.select().where(Object.project == project_id).count()
-
-                return {
+        summaries = DatabaseAPI.get_project_summaries([project_id])
+        return summaries[0] if summaries else None
+
+    @staticmethod
+    def get_project_summaries(project_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Get the dashboard counters of all (or the given) projects in one query.
+
+        Each count comes from a subquery grouped by project and LEFT JOINed to
+        the projects, so the cost does not grow with the number of projects
+        shown. Videos rendered from another video are not counted. Annotated
+        frames are the distinct (video, frame) pairs holding at least one
+        point; coverage is their share of the extracted frames.
+
+        Returns:
+            List of dicts with project, videos_count, objects_count,
+            points_count, frames_count, annotated_frames_count and coverage,
+            ordered by project ID
+        """
+        video_counts = (Videos
+                        .select(Videos.project, fn.COUNT(Videos.id).alias('n'))
+                        .where(_not_rendered())
+                        .group_by(Videos.project)
+                        .alias('video_counts'))
+        object_counts = (Object
+                         .select(Object.project, fn.COUNT(Object.id).alias('n'))
+                         .group_by(Object.project)
+                         .alias('object_counts'))
+        frame_counts = (Frame
+                        .select(Videos.project, fn.COUNT(Frame.id).alias('n'))
+                        .join(Videos)
+                        .group_by(Videos.project)
+                        .alias('frame_counts'))
+        # One row per annotated (video, frame), read in order from the (video, frame_idx) index
+        annotated_frames = (ObjectPoint
+                            .select(ObjectPoint.video, fn.COUNT(ObjectPoint.id).alias('n'))
+                            .group_by(ObjectPoint.video, ObjectPoint.frame_idx)
+                            .alias('annotated_frames'))
+        point_counts = (Videos
+                        .select(Videos.project,
+                                fn.SUM(annotated_frames.c.n).alias('points'),
+                                fn.COUNT(annotated_frames.c.video_id).alias('frames'))
+                        .join(annotated_frames, on=(annotated_frames.c.video_id == Videos.id))
+                        .group_by(Videos.project)
+                        .alias('point_counts'))
+
+        query = (Project
+                 .select(Project,
+                         fn.COALESCE(video_counts.c.n, 0).alias('videos_count'),
+                         fn.COALESCE(object_counts.c.n, 0).alias('objects_count'),
+                         fn.COALESCE(point_counts.c.points, 0).alias('points_count'),
+                         fn.COALESCE(frame_counts.c.n, 0).alias('frames_count'),
+                         fn.COALESCE(point_counts.c.frames, 0).alias('annotated_frames_count'))
+                 .join_from(Project, video_counts, JOIN.LEFT_OUTER,
+                            on=(video_counts.c.project_id == Project.id))
+                 .join_from(Project, object_counts, JOIN.LEFT_OUTER,
+                            on=(object_counts.c.project_id == Project.id))
+                 .join_from(Project, frame_counts, JOIN.LEFT_OUTER,
+                            on=(frame_counts.c.project_id == Project.id))
+                 .join_from(Project, point_counts, JOIN.LEFT_OUTER,
+                            on=(point_counts.c.project_id == Project.id))
+                 .order_by(Project.id))
+        if project_ids is not None:
+            query = query.where(Project.id.in_(project_ids))
+
+        with get_db_session():
+            summaries = []
+            for project in query.objects():
+                summaries.append({
                     'project': project,
-                    'videos_count': videos_count,
-                    'objects_count': objects_count
-                }
-            except DoesNotExist:
-                return None
+                    'videos_count': project.videos_count,
+                    'objects_count': project.objects_count,
+                    'points_count': project.points_count,
+                    'frames_count': project.frames_count,
+                    'annotated_frames_count': project.annotated_frames_count,
+                    'coverage': (project.annotated_frames_count / project.frames_count
+                                 if project.frames_count else 0.0),
+                })
+            return summaries
 
 
 # Create a singleton instance for easy access
@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+import cv2
+from flask import Blueprint, Flask, Response, jsonify, request
+
+from db.models import Frame
+from .cache import ByteCache
+from .db import DatabaseAPI
+
+logger = logging.getLogger(__name__)
+
+# Threads encoding frame variants
+FRAME_ENCODE_WORKERS = int(os.environ.get("EASYSAM_FRAME_ENCODE_WORKERS", "2"))
+
+# Memory for encoded frames, shared by all videos
+FRAME_CACHE_BYTES = int(os.environ.get("EASYSAM_FRAME_CACHE_MB", "256")) * 1024 * 1024
+
+# Frames after a requested one that are encoded ahead, for stepping through a video
+FRAME_PREFETCH = 4
+
+# Output formats: mimetype, file suffixes served as-is when not resized, OpenCV encoder params
+FRAME_FORMATS = {
+    "jpeg": ("image/jpeg", (".jpg", ".jpeg"), [cv2.IMWRITE_JPEG_QUALITY, 85]),
+    "webp": ("image/webp", (".webp",), [cv2.IMWRITE_WEBP_QUALITY, 80]),
+}
+DEFAULT_FRAME_FORMAT = "jpeg"
+
+# Range of widths a variant can be requested at (frames are never upscaled)
+MIN_FRAME_WIDTH = 16
+MAX_FRAME_WIDTH = 8192
+
+# Part of every ETag; bump it when the encoding settings change
+FRAME_VARIANT_VERSION = 1
+
+# Responses to URLs carrying the frame's content hash can be cached forever;
+# others must be revalidated, since re-extracting a video changes its frames
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Characters of the content hash put in frame URLs
+URL_HASH_LENGTH = 16
+
+frames_bp = Blueprint("frames", __name__, url_prefix="/api/frames")
+
+# Encoded variants keyed by (content hash, width, format)
+VariantKey = Tuple[str, Optional[int], str]
+
+_variant_cache = ByteCache("frames", FRAME_CACHE_BYTES)
+_encode_pool = ThreadPoolExecutor(max_workers=FRAME_ENCODE_WORKERS, thread_name_prefix="frame-encode")
+_pending: Dict[VariantKey, Future] = {}
+_pending_lock = Lock()
+
+
+def register_frame_routes(server: Flask) -> None:
+    """Register the frame serving endpoint on the Dash Flask server."""
+    server.register_blueprint(frames_bp)
+
+
+def frame_url(frame: Frame, width: Optional[int] = None, fmt: str = DEFAULT_FRAME_FORMAT) -> str:
+    """URL of a frame variant, versioned by the frame's content so browsers can cache it forever."""
+    params = {"v": frame.content_hash[:URL_HASH_LENGTH]}
+    if width is not None:
+        params["width"] = width
+    if fmt != DEFAULT_FRAME_FORMAT:
+        params["format"] = fmt
+    return f"{frames_bp.url_prefix}/{frame.video_id}/{frame.frame_idx}?{urlencode(params)}"
+
+
+@frames_bp.get("/<int:video_id>/<int:frame_idx>")
+def get_frame(video_id: int, frame_idx: int):
+    """Serve an extracted frame, optionally downscaled and re-encoded.
+
+    Query: width (int, optional), format ("jpeg" or "webp", default jpeg),
+    v (content hash prefix, as added by frame_url). Encoded variants are
+    kept in memory, and the next frames of the video are encoded in the
+    background so stepping forward does not wait for the encoder.
+    """
+    fmt = request.args.get("format", DEFAULT_FRAME_FORMAT).lower()
+    if fmt not in FRAME_FORMATS:
+        return _error(f"format must be one of {', '.join(FRAME_FORMATS)}", 400)
+    width = request.args.get("width", type=int)
+    if "width" in request.args and (width is None or not MIN_FRAME_WIDTH <= width <= MAX_FRAME_WIDTH):
+        return _error(f"width must be an integer between {MIN_FRAME_WIDTH} and {MAX_FRAME_WIDTH}", 400)
+
+    frame = DatabaseAPI.get_frame(video_id, frame_idx)
+    if frame is None:
+        return _error("frame not found", 404)
+
+    version = request.args.get("v")
+    cache_control = (IMMUTABLE_CACHE_CONTROL if version and frame.content_hash.startswith(version)
+                     else REVALIDATE_CACHE_CONTROL)
+    etag = _variant_etag(frame.content_hash, width, fmt)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        try:
+            data = encode_frame(frame.path, frame.content_hash, width, fmt)
+        except FileNotFoundError:
+            return _error("frame file not found", 404)
+        response = Response(data, mimetype=FRAME_FORMATS[fmt][0])
+        _prefetch(video_id, frame_idx, width, fmt)
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def encode_frame(path: str, content_hash: str, width: Optional[int] = None,
+                 fmt: str = DEFAULT_FRAME_FORMAT) -> bytes:
+    """Encoded bytes of a frame variant, from the cache or the encoder pool.
+
+    Concurrent requests for the same variant share one encoding.
+
+    Raises:
+        FileNotFoundError: If the frame file does not exist
+        RuntimeError: If the frame cannot be decoded or encoded
+    """
+    key = (content_hash, width, fmt)
+    data = _variant_cache.get(key)
+    if data is not None:
+        return data
+    return _submit(key, path).result()
+
+
+def frame_cache_stats() -> Dict[str, object]:
+    """Hit and miss counters and size of the encoded frame cache"""
+    return _variant_cache.stats()
+
+
+def _prefetch(video_id: int, frame_idx: int, width: Optional[int], fmt: str) -> None:
+    for frame in DatabaseAPI.get_frames_in_range(video_id, frame_idx + 1, frame_idx + 1 + FRAME_PREFETCH):
+        key = (frame.content_hash, width, fmt)
+        if key not in _variant_cache:
+            _submit(key, frame.path)
+
+
+def _submit(key: VariantKey, path: str) -> Future:
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _encode_pool.submit(_encode, key, path)
+            _pending[key] = future
+        return future
+
+
+def _encode(key: VariantKey, path: str) -> bytes:
+    try:
+        data = _encode_variant(Path(path), key[1], key[2])
+        # Cached before the pending entry is dropped, so no request re-encodes in between
+        _variant_cache.put(key, data)
+        return data
+    except Exception as e:
+        logger.warning(f"Failed to encode frame {path} (width={key[1]}, format={key[2]}): {e}")
+        raise
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)
+
+
+def _encode_variant(path: Path, width: Optional[int], fmt: str) -> bytes:
+    _, suffixes, params = FRAME_FORMATS[fmt]
+    if width is None and path.suffix.lower() in suffixes:
+        return path.read_bytes()
+
+    image = cv2.imread(str(path), cv2.IMREAD_COLOR)
+    if image is None:
+        if not path.exists():
+            raise FileNotFoundError(f"Frame file {path} does not exist")
+        raise RuntimeError(f"Cannot read frame {path}")
+    height, frame_width = image.shape[:2]
+    if width is not None and width >= frame_width and path.suffix.lower() in suffixes:
+        return path.read_bytes()
+    if width is not None and width < frame_width:
+        image = cv2.resize(image, (width, max(1, round(height * width / frame_width))),
+                           interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(suffixes[0], image, params)
+    if not ok:
+        raise RuntimeError(f"Cannot encode frame {path} as {fmt}")
+    return encoded.tobytes()
+
+
+def _variant_etag(content_hash: str, width: Optional[int], fmt: str) -> str:
+    variant = f"{FRAME_VARIANT_VERSION}:{content_hash}:{width or ''}:{fmt}"
+    return hashlib.sha256(variant.encode()).hexdigest()[:32]
+
+
+def _error(message: str, status: int):
+    return jsonify({"error": message}), status
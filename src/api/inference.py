@@ -1,18 +1,79 @@
 import contextlib
 import logging
 import os
+import shutil
+import tempfile
 import uuid
 from threading import Lock
 from typing import Any, Dict, List, Tuple, Generator, Optional
 
 import numpy as np
 import torch
+from PIL import Image
 from sam2.build_sam import build_sam2_video_predictor
 from pycocotools.mask import encode as encode_masks
 
 
 logger = logging.getLogger(__name__)
 
+# Width of the masks returned for previews, see preview_size
+PREVIEW_MAX_WIDTH = 720
+
+
+def preview_size(height: int, width: int, max_width: int = PREVIEW_MAX_WIDTH) -> Tuple[int, int]:
+    """(height, width) of preview masks for a video: at most max_width wide, same aspect ratio"""
+    if width <= max_width:
+        return height, width
+    return max(1, round(height * max_width / width)), max_width
+
+
+class ProgressiveFrameLoader:
+    """Frame source for a SAM2 inference state whose video is still being extracted.
+
+    Stands in for the image tensor SAM2 keeps in `inference_state["images"]`:
+    frames are loaded, resized and normalized the same way SAM2 does, but only
+    when first requested, blocking until the extraction has written them.
+    `frame_source` is an ExtractionJob (or anything with the same
+    `frames_available` and `wait_for_frame` methods).
+    """
+
+    # ImageNet statistics used by SAM2 to normalize frames
+    IMG_MEAN = (0.485, 0.456, 0.406)
+    IMG_STD = (0.229, 0.224, 0.225)
+
+    def __init__(self, frame_source: Any, image_size: int, device: torch.device,
+                 offload_video_to_cpu: bool) -> None:
+        self.frame_source = frame_source
+        self.image_size = image_size
+        self.device = device
+        self.offload_video_to_cpu = offload_video_to_cpu
+        self.images: Dict[int, torch.Tensor] = {}
+        self.img_mean = torch.tensor(self.IMG_MEAN, dtype=torch.float32)[:, None, None]
+        self.img_std = torch.tensor(self.IMG_STD, dtype=torch.float32)[:, None, None]
+
+    def __len__(self) -> int:
+        return max(self.frame_source.frames_available(), len(self.images))
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        img = self.images.get(index)
+        if img is not None:
+            return img
+
+        frame_path = self.frame_source.wait_for_frame(index)
+        if frame_path is None:
+            raise IndexError(f"frame {index} is past the end of the video")
+
+        with Image.open(frame_path) as frame:
+            frame = frame.convert("RGB").resize((self.image_size, self.image_size))
+            img_np = np.asarray(frame, dtype=np.float32) / 255.0
+        img = torch.from_numpy(img_np).permute(2, 0, 1)
+        img = (img - self.img_mean) / self.img_std
+        if not self.offload_video_to_cpu:
+            img = img.to(self.device, non_blocking=True)
+
+        self.images[index] = img
+        return img
+
 
 class InferenceAPI:
 
@@ -72,15 +133,21 @@ class InferenceAPI:
         else:
             return contextlib.nullcontext()
 
-    def start_session(self, frame_directory: str) -> str:
+    def start_session(self, frame_directory: str, frame_source: Optional[Any] = None) -> str:
         """Start a new inference session for a video file using it's frame directory.
 
         Args:
             frame_directory: Path to the directory containing video frames
+            frame_source: Running ExtractionJob for the frames, if extraction has
+                not finished. The session then starts as soon as the first frame
+                exists and loads later frames as they become available.
 
         Returns:
             session_id: Unique identifier for the session
         """
+        if frame_source is not None:
+            return self.__start_progressive_session(frame_directory, frame_source)
+
         with self.autocast_context(), self.inference_lock:
             session_id = str(uuid.uuid4())
             # for MPS devices, we offload the video frames to CPU by default to avoid
@@ -98,6 +165,49 @@ class InferenceAPI:
                 f"Started new session {session_id} for video frames: {frame_directory}")
             return session_id
 
+    def __start_progressive_session(self, frame_directory: str, frame_source: Any) -> str:
+        first_frame = frame_source.wait_for_frame(0)
+        if first_frame is None:
+            raise RuntimeError(f"No frames were extracted to {frame_directory}")
+
+        offload_video_to_cpu = self.device.type == "mps"
+        with self.autocast_context(), self.inference_lock:
+            session_id = str(uuid.uuid4())
+            # SAM2 builds its state from a JPEG folder, so initialize it from the
+            # first frame alone (PIL detects the real format) and swap in the loader
+            with tempfile.TemporaryDirectory() as staging_dir:
+                shutil.copyfile(first_frame, os.path.join(staging_dir, "0.jpg"))
+                inference_state = self.predictor.init_state(
+                    staging_dir,
+                    offload_video_to_cpu=offload_video_to_cpu,
+                )
+
+            frame_loader = ProgressiveFrameLoader(
+                frame_source,
+                image_size=self.predictor.image_size,
+                device=self.device,
+                offload_video_to_cpu=offload_video_to_cpu,
+            )
+            frame_loader.images[0] = inference_state["images"][0]
+            inference_state["images"] = frame_loader
+            inference_state["num_frames"] = len(frame_loader)
+
+            self.session_states[session_id] = {
+                "canceled": False,
+                "state": inference_state,
+                "frame_loader": frame_loader,
+            }
+            logger.info(
+                f"Started new session {session_id} for partially extracted video frames: "
+                f"{frame_directory} ({inference_state['num_frames']} frames available)")
+            return session_id
+
+    def __sync_frame_count(self, session: Dict[str, Any]) -> None:
+        """Extend a progressive session to the frames extracted since the last call."""
+        frame_loader = session.get("frame_loader")
+        if frame_loader is not None:
+            session["state"]["num_frames"] = len(frame_loader)
+
     def close_session(self, session_id: str) -> bool:
         """Close an inference session and clean up resources.
 
@@ -162,7 +272,8 @@ class InferenceAPI:
         object_id: int,
         points: List[List[float]],
         labels: List[int],
-        clear_old_points: bool = True
+        clear_old_points: bool = True,
+        output_size: Optional[Tuple[int, int]] = None
     ) -> Tuple[int, List[int], List[Dict[str, Any]]]:
         """Add new points on a specific video frame.
 
@@ -173,12 +284,15 @@ class InferenceAPI:
             points: List of [x, y] coordinates
             labels: List of labels (1 for positive, 0 for negative)
             clear_old_points: Whether to clear previous points
+            output_size: (height, width) to return the masks at instead of the
+                video resolution, e.g. preview_size(...) for previews
 
         Returns:
             Tuple of (frame_index, object_ids, masks_rle)
         """
         with self.autocast_context(), self.inference_lock:
             session = self.__get_session(session_id)
+            self.__sync_frame_count(session)
             inference_state = session["state"]
 
             # add new prompts and instantly get the output on the same frame
@@ -192,7 +306,7 @@ class InferenceAPI:
                 normalize_coords=False,
             )
 
-            masks_binary = (masks > self.score_thresh)[:, 0].cpu().numpy()
+            masks_binary = self.__masks_to_host(masks, output_size)
 
             # Use the existing helper method
             masks_rle = self.__get_rle_mask_list(
@@ -201,6 +315,77 @@ class InferenceAPI:
 
             return frame_idx, object_ids, masks_rle
 
+    def add_points_batch(
+        self,
+        session_id: str,
+        prompts: List[Dict[str, Any]],
+        clear_old_points: bool = False,
+        return_masks: bool = True,
+        output_size: Optional[Tuple[int, int]] = None
+    ) -> List[Tuple[int, List[int], List[Dict[str, Any]]]]:
+        """Add many prompts in one call, one predictor update per (frame, object).
+
+        The session is locked once for the whole batch, and masks are only
+        converted to RLE for the last update of each frame, which already
+        contains every object prompted on that frame.
+
+        Args:
+            session_id: The session identifier
+            prompts: List of dicts with frame_index, object_id, points and labels,
+                with at most one entry per (frame_index, object_id)
+            clear_old_points: Whether each prompt replaces the object's previous
+                points on its frame
+            return_masks: Whether to copy and encode the resulting masks; when
+                False, masks_rle is an empty list
+            output_size: (height, width) to return the masks at instead of the
+                video resolution, e.g. preview_size(...) for previews
+
+        Returns:
+            List of (frame_index, object_ids, masks_rle), one per prompted frame
+        """
+        last_outputs: Dict[int, Tuple[List[int], torch.Tensor]] = {}
+        with self.autocast_context(), self.inference_lock:
+            session = self.__get_session(session_id)
+            self.__sync_frame_count(session)
+            inference_state = session["state"]
+
+            for prompt in prompts:
+                frame_idx, object_ids, masks = self.predictor.add_new_points_or_box(
+                    inference_state=inference_state,
+                    frame_idx=prompt["frame_index"],
+                    obj_id=prompt["object_id"],
+                    points=prompt["points"],
+                    labels=prompt["labels"],
+                    clear_old_points=clear_old_points,
+                    normalize_coords=False,
+                )
+                last_outputs[frame_idx] = (object_ids, masks)
+
+            results = []
+            for frame_idx, (object_ids, masks) in last_outputs.items():
+                if not return_masks:
+                    results.append((frame_idx, object_ids, []))
+                    continue
+                masks_binary = self.__masks_to_host(masks, output_size)
+                results.append((frame_idx, object_ids, self.__get_rle_mask_list(
+                    object_ids=object_ids, masks=masks_binary
+                )))
+            return results
+
+    def __masks_to_host(
+        self, masks: torch.Tensor, output_size: Optional[Tuple[int, int]] = None
+    ) -> np.ndarray:
+        """Binary (N, H, W) masks on the host from (N, 1, H, W) mask logits on the device.
+
+        The logits are resized to output_size and thresholded on the device,
+        so only the binary masks at the requested size are copied to the host
+        and RLE-encoded.
+        """
+        if output_size is not None and tuple(masks.shape[-2:]) != tuple(output_size):
+            masks = torch.nn.functional.interpolate(
+                masks.float(), size=tuple(output_size), mode="bilinear", align_corners=False)
+        return (masks > self.score_thresh)[:, 0].cpu().numpy()
+
     def __get_rle_mask_list(
         self, object_ids: List[int], masks: np.ndarray
     ) -> List[Dict[str, Any]]:
@@ -236,7 +421,8 @@ class InferenceAPI:
         self,
         session_id: str,
         frame_index: int,
-        object_id: int
+        object_id: int,
+        output_size: Optional[Tuple[int, int]] = None
     ) -> Tuple[int, List[int], List[Dict[str, Any]]]:
         """Remove all input points in a specific frame.
 
@@ -244,12 +430,15 @@ class InferenceAPI:
             session_id: The session identifier
             frame_index: Frame index to clear points from
             object_id: Object ID to clear points for
+            output_size: (height, width) to return the masks at instead of the
+                video resolution, e.g. preview_size(...) for previews
 
         Returns:
             Tuple of (frame_index, object_ids, masks_rle)
         """
         with self.autocast_context(), self.inference_lock:
             session = self.__get_session(session_id)
+            self.__sync_frame_count(session)
             inference_state = session["state"]
 
             frame_idx, obj_ids, video_res_masks = (
@@ -257,8 +446,7 @@ class InferenceAPI:
                     inference_state, frame_index, object_id
                 )
             )
-            masks_binary = (video_res_masks > self.score_thresh)[
-                :, 0].cpu().numpy()
+            masks_binary = self.__masks_to_host(video_res_masks, output_size)
 
             masks_rle = self.__get_rle_mask_list(
                 object_ids=obj_ids, masks=masks_binary
@@ -284,13 +472,16 @@ class InferenceAPI:
     def remove_object(
         self,
         session_id: str,
-        object_id: int
+        object_id: int,
+        output_size: Optional[Tuple[int, int]] = None
     ) -> List[Tuple[int, List[int], List[Dict[str, Any]]]]:
         """Remove an object id from the tracking state.
 
         Args:
             session_id: The session identifier
             object_id: Object ID to remove from tracking
+            output_size: (height, width) to return the masks at instead of the
+                video resolution, e.g. preview_size(...) for previews
 
         Returns:
             List of tuples containing (frame_index, object_ids, masks_rle) for updated frames
@@ -304,8 +495,7 @@ class InferenceAPI:
 
             results = []
             for frame_index, video_res_masks in updated_frames:
-                masks = (video_res_masks > self.score_thresh)[
-                    :, 0].cpu().numpy()
+                masks = self.__masks_to_host(video_res_masks, output_size)
                 rle_mask_list = self.__get_rle_mask_list(
                     object_ids=new_obj_ids, masks=masks
                 )
@@ -318,7 +508,8 @@ class InferenceAPI:
         session_id: str,
         start_frame_index: int,
         propagation_direction: str = "both",
-        max_frame_num_to_track: Optional[int] = None
+        max_frame_num_to_track: Optional[int] = None,
+        output_size: Optional[Tuple[int, int]] = None
     ) -> Generator[Tuple[int, List[int], List[Dict[str, Any]]], None, None]:
         """Propagate existing input points in all frames to track the object across video.
 
@@ -327,6 +518,8 @@ class InferenceAPI:
             start_frame_index: Frame index to start propagation from
             propagation_direction: Direction to propagate ("both", "forward", "backward")
             max_frame_num_to_track: Maximum number of frames to track
+            output_size: (height, width) to return the masks at instead of the
+                video resolution, e.g. preview_size(...) for previews
 
         Yields:
             Tuple of (frame_index, object_ids, masks_rle) for each frame
@@ -340,6 +533,7 @@ class InferenceAPI:
             try:
                 session = self.__get_session(session_id)
                 session["canceled"] = False
+                self.__sync_frame_count(session)
 
                 inference_state = session["state"]
                 if propagation_direction not in ["both", "forward", "backward"]:
@@ -359,10 +553,8 @@ class InferenceAPI:
                             return
 
                         frame_idx, obj_ids, video_res_masks = outputs
-                        masks_binary = (
-                            (video_res_masks > self.score_thresh)[
-                                :, 0].cpu().numpy()
-                        )
+                        masks_binary = self.__masks_to_host(
+                            video_res_masks, output_size)
 
                         rle_mask_list = self.__get_rle_mask_list(
                             object_ids=obj_ids, masks=masks_binary
@@ -382,10 +574,8 @@ class InferenceAPI:
                             return
 
                         frame_idx, obj_ids, video_res_masks = outputs
-                        masks_binary = (
-                            (video_res_masks > self.score_thresh)[
-                                :, 0].cpu().numpy()
-                        )
+                        masks_binary = self.__masks_to_host(
+                            video_res_masks, output_size)
 
                         rle_mask_list = self.__get_rle_mask_list(
                             object_ids=obj_ids, masks=masks_binary
@@ -0,0 +1,351 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from utils.frames import extract_frames, start_extraction, frame_records
+from utils.probe import probe_video
+from utils.paths import (
+    UPLOADS_DIR, get_original_frames_path, get_thumbnails_path, get_preview_proxy_path, get_video_path
+)
+from .cleanup import disk_cleanup
+from .db import DatabaseAPI
+from .uploads import claim_upload, get_completed_upload
+
+logger = logging.getLogger(__name__)
+
+# Job state is kept on disk so progress survives page reloads and restarts
+INGEST_JOBS_DIR = UPLOADS_DIR / ".jobs"
+
+# Number of videos processed concurrently
+DEFAULT_INGEST_WORKERS = int(os.environ.get("EASYSAM_INGEST_WORKERS", "2"))
+
+# Project that videos are added to when none is given
+DEFAULT_PROJECT_NAME = "Default"
+
+# Number of leading frames read into the OS page cache by the prewarm stage
+PREWARM_FRAMES = 64
+
+# Pipeline stages, in order
+INGEST_STAGES = ("save", "probe", "register", "extract", "index", "prewarm")
+
+
+class IngestJobStore:
+    """Thread-safe store of ingest job states, persisted as one JSON file per job"""
+
+    def __init__(self, job_dir: Path = INGEST_JOBS_DIR) -> None:
+        self.job_dir = Path(job_dir)
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+        # Jobs that were running when the server stopped will never finish
+        for job_path in self.job_dir.glob("*.json"):
+            try:
+                with open(job_path) as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if job["status"] in ("queued", "running"):
+                job["status"] = "failed"
+                job["error"] = "Interrupted by a server restart"
+                self._write(job)
+            self._jobs[job["job_id"]] = job
+
+    def create(self, **fields: Any) -> Dict[str, Any]:
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "stage": None,
+            "stages": {stage: {"status": "pending", "progress": 0.0} for stage in INGEST_STAGES},
+            "error": None,
+            "video_id": None,
+            "created_at": time.time(),
+            **fields,
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            self._write(job)
+        return json.loads(json.dumps(job))
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Hand out copies so callers never see a half-updated job
+            return json.loads(json.dumps(job)) if job is not None else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields)
+            self._write(job)
+
+    def update_stage(self, job_id: str, stage: str, status: str, progress: Optional[float] = None) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job["stages"][stage]["status"] = status
+            if progress is not None:
+                job["stages"][stage]["progress"] = progress
+            if status == "running":
+                job["stage"] = stage
+            self._write(job)
+
+    def _write(self, job: Dict[str, Any]) -> None:
+        job_path = self.job_dir / f"{job['job_id']}.json"
+        tmp_path = job_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, job_path)
+
+
+class IngestPipeline:
+    """Background pipeline turning an uploaded video into a registered, extracted video.
+
+    Stages: save the upload into the video's directory, probe its metadata,
+    register it in the database, extract frames (with thumbnails and preview
+    proxy), index the frames in the database and optionally prewarm the page
+    cache. The video is registered before extraction so inference sessions can
+    start on it while frames are still being written; if a later stage fails,
+    the video and its files are removed again.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_INGEST_WORKERS, job_dir: Path = INGEST_JOBS_DIR) -> None:
+        self.max_workers = max_workers
+        self.job_dir = job_dir
+        self._store: Optional[IngestJobStore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Video names of the jobs currently running, see _reserve_name
+        self._active_names: Set[str] = set()
+
+    @property
+    def store(self) -> IngestJobStore:
+        self._start()
+        return self._store
+
+    def _start(self) -> None:
+        # Created on first use so importing the module has no side effects
+        with self._lock:
+            if self._executor is None:
+                self._store = IngestJobStore(self.job_dir)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ingest")
+
+    def submit(self, upload_id: str, video_name: str, frame_step: int,
+               project_id: Optional[int] = None, prewarm: bool = True) -> str:
+        """Queue an uploaded video for processing.
+
+        Args:
+            upload_id: ID of a completed chunked upload
+            video_name: Name of the video, also used for its directory
+            frame_step: Keep one frame every `frame_step` frames
+            project_id: Project to add the video to, the default project if None
+            prewarm: Whether to read the first frames into the page cache
+
+        Returns:
+            str: ID of the ingest job
+        """
+        job = self.store.create(video_name=video_name, upload_id=upload_id, frame_step=frame_step)
+        self._executor.submit(self._run, job["job_id"], upload_id, video_name,
+                              frame_step, project_id, prewarm)
+        logger.info(f"Queued ingest job {job['job_id']} for video {video_name}")
+        return job["job_id"]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current state of an ingest job"""
+        return self.store.get(job_id)
+
+    def get_jobs(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the current state of several ingest jobs, skipping unknown IDs"""
+        jobs = (self.store.get(job_id) for job_id in job_ids)
+        return [job for job in jobs if job is not None]
+
+    def _run(self, job_id: str, upload_id: str, video_name: str, frame_step: int,
+             project_id: Optional[int], prewarm: bool) -> None:
+        store = self.store
+        store.update(job_id, status="running")
+        stage = None
+        reserved = False
+        video = None
+        try:
+            stage = "save"
+            store.update_stage(job_id, stage, "running")
+            self._reserve_name(video_name)
+            reserved = True
+            video_path = self._save(upload_id, video_name)
+            store.update_stage(job_id, stage, "done", 1.0)
+
+            stage = "probe"
+            store.update_stage(job_id, stage, "running")
+            metadata = probe_video(video_path)
+            store.update_stage(job_id, stage, "done", 1.0)
+
+            stage = "register"
+            store.update_stage(job_id, stage, "running")
+            if project_id is None:
+                project_id = DatabaseAPI.get_or_create_project(DEFAULT_PROJECT_NAME).id
+            frame_directory = get_original_frames_path(video_name)
+            video = DatabaseAPI.create_video(
+                project_id=project_id,
+                name=video_name,
+                file_path=str(video_path),
+                frame_directory=str(frame_directory),
+                **metadata.as_video_fields()
+            )
+            if video is None:
+                raise RuntimeError("Failed to register the video in the database")
+            store.update(job_id, video_id=video.id)
+            store.update_stage(job_id, stage, "done", 1.0)
+
+            stage = "extract"
+            store.update_stage(job_id, stage, "running")
+            extraction = start_extraction(
+                video_path, frame_directory, frame_step,
+                duration=metadata.duration,
+                thumbnail_dir=get_thumbnails_path(video_name),
+                proxy_path=get_preview_proxy_path(video_name),
+            )
+            while not extraction.done:
+                store.update_stage(job_id, stage, "running", extraction.fraction)
+                time.sleep(0.5)
+            frames = extraction.wait()
+            store.update_stage(job_id, stage, "done", 1.0)
+
+            stage = "index"
+            store.update_stage(job_id, stage, "running")
+            records = frame_records(video_path, frame_directory, frame_rate=metadata.fps)
+            DatabaseAPI.create_frames_bulk(video.id, records)
+            store.update_stage(job_id, stage, "done", 1.0)
+
+            stage = "prewarm"
+            if prewarm:
+                store.update_stage(job_id, stage, "running")
+                _prewarm(frames[:PREWARM_FRAMES])
+                store.update_stage(job_id, stage, "done", 1.0)
+            else:
+                store.update_stage(job_id, stage, "skipped")
+
+            store.update(job_id, status="done", stage=None)
+            logger.info(f"Ingest job {job_id} finished: video {video.id} with {len(frames)} frames")
+        except Exception as e:
+            logger.error(f"Ingest job {job_id} failed during {stage}: {e}")
+            if stage is not None:
+                store.update_stage(job_id, stage, "failed")
+            if reserved:
+                self._discard_video(video_name, video)
+            store.update(job_id, status="failed", error=str(e), video_id=None)
+        finally:
+            if reserved:
+                with self._lock:
+                    self._active_names.discard(video_name)
+
+    def _reserve_name(self, video_name: str) -> None:
+        """Claim a video name for this job, so its files cannot replace another video's.
+
+        Raises:
+            ValueError: If a video or another running job already uses the name,
+                or its directory exists
+        """
+        with self._lock:
+            if (video_name in self._active_names
+                    or DatabaseAPI.get_video_by_name(video_name) is not None
+                    or get_video_path(video_name).exists()):
+                raise ValueError(f"A video named {video_name!r} already exists")
+            self._active_names.add(video_name)
+
+    def _discard_video(self, video_name: str, video: Optional[Any]) -> None:
+        """Remove what a failed job registered and wrote for its video."""
+        if video is not None:
+            DatabaseAPI.delete_video(video.id)
+        else:
+            disk_cleanup.schedule([get_video_path(video_name)])
+
+    def _save(self, upload_id: str, video_name: str) -> Path:
+        upload = get_completed_upload(upload_id)
+        if upload is None:
+            raise RuntimeError(f"Upload {upload_id} not found or not complete")
+        ext = Path(upload["filename"]).suffix or ".mp4"
+        return claim_upload(upload_id, get_video_path(video_name) / f"{video_name}{ext}")
+
+
+def extract_video_file(video_path: str, video_name: str, frame_step: int) -> Dict[str, Any]:
+    """Probe a video file and extract its frames, thumbnails and preview proxy.
+
+    Does not touch the database, so it can run in a worker process; pass the
+    result to register_extracted_video in the process that owns the database.
+
+    Returns:
+        Dict with video_path, video_name, frame_directory, metadata (width,
+        height, fps, duration) and frames (records for create_frames_bulk)
+    """
+    metadata = probe_video(video_path)
+    frame_directory = get_original_frames_path(video_name)
+    extract_frames(
+        video_path, frame_directory, frame_step,
+        thumbnail_dir=get_thumbnails_path(video_name),
+        proxy_path=get_preview_proxy_path(video_name),
+    )
+    return {
+        "video_path": str(video_path),
+        "video_name": video_name,
+        "frame_directory": str(frame_directory),
+        "metadata": metadata.as_video_fields(),
+        "frames": frame_records(video_path, frame_directory, frame_rate=metadata.fps),
+    }
+
+
+def register_extracted_video(result: Dict[str, Any], project_id: int) -> Any:
+    """Create the Videos and Frame rows for the output of extract_video_file.
+
+    Returns:
+        Videos: The registered video
+
+    Raises:
+        RuntimeError: If the video could not be created
+    """
+    return register_extracted_videos([result], project_id)[0]
+
+
+def register_extracted_videos(results: List[Dict[str, Any]], project_id: int) -> List[Any]:
+    """Create the Videos rows for several extract_video_file outputs in one
+    transaction, then index the frames of each.
+
+    Returns:
+        List[Videos]: The registered videos, in input order
+
+    Raises:
+        RuntimeError: If the videos could not be created
+    """
+    videos = DatabaseAPI.create_videos_bulk([
+        {
+            "project_id": project_id,
+            "name": result["video_name"],
+            "file_path": result["video_path"],
+            "frame_directory": result["frame_directory"],
+            **result["metadata"],
+        }
+        for result in results
+    ])
+    if len(videos) != len(results):
+        paths = ", ".join(result["video_path"] for result in results)
+        raise RuntimeError(f"Failed to register {paths} in the database")
+    for video, result in zip(videos, results):
+        DatabaseAPI.create_frames_bulk(video.id, result["frames"])
+    return videos
+
+
+def _prewarm(frame_paths: List[Path]) -> None:
+    """Read frames once so the first inference session loads them from memory."""
+    for frame_path in frame_paths:
+        with open(frame_path, "rb") as f:
+            while f.read(1 << 20):
+                pass
+
+
+# Create a singleton instance shared by the pages
+ingest_pipeline = IngestPipeline()
@@ -0,0 +1,161 @@
+"""
+Operations on COCO RLE masks that never decode them to full-frame arrays
+
+Every function accepts the RLE dicts emitted by InferenceAPI ({"size",
+"counts"} with str or bytes counts) or the per-object entries wrapping them
+({"object_id", "mask"}). Lists are handed to pycocotools' batch functions,
+which work on the run lengths directly.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pycocotools import mask as coco_mask
+
+# Objects whose IoU with their previous mask is at least this are unchanged
+DEFAULT_CHANGE_IOU = 0.95
+
+# pycocotools' area() overflows on 256 or more masks per call (its result
+# size goes through a uint8 with numpy 2), so it is called in batches
+AREA_BATCH_SIZE = 255
+
+# paired_iou() computes the IoU matrix of blocks of this many pairs and keeps
+# their diagonals: one pycocotools call per block, with the pairs computed
+# growing with N * block size rather than N * N
+PAIRED_IOU_BLOCK_SIZE = 32
+
+MaskList = Sequence[Dict[str, Any]]
+
+
+def _as_rles(masks: MaskList) -> List[Dict[str, Any]]:
+    return [entry["mask"] if "mask" in entry else entry for entry in masks]
+
+
+def _to_emitted(rle: Dict[str, Any]) -> Dict[str, Any]:
+    counts = rle["counts"]
+    return {"size": list(rle["size"]),
+            "counts": counts.decode() if isinstance(counts, bytes) else counts}
+
+
+def mask_areas(masks: MaskList) -> np.ndarray:
+    """Foreground pixel count of each mask, as an int64 array of shape (N,)"""
+    if not masks:
+        return np.zeros(0, dtype=np.int64)
+    rles = _as_rles(masks)
+    return np.concatenate([
+        coco_mask.area(rles[start:start + AREA_BATCH_SIZE]).astype(np.int64)
+        for start in range(0, len(rles), AREA_BATCH_SIZE)
+    ])
+
+
+def mask_bboxes(masks: MaskList) -> np.ndarray:
+    """Bounding box of each mask as [x, y, width, height], shape (N, 4).
+
+    Empty masks get an all-zero box.
+    """
+    if not masks:
+        return np.zeros((0, 4), dtype=np.float64)
+    return coco_mask.toBbox(_as_rles(masks))
+
+
+def iou_matrix(masks_a: MaskList, masks_b: MaskList) -> np.ndarray:
+    """IoU of every mask in masks_a with every mask in masks_b, shape (N, M)
+
+    All masks must have the same size.
+    """
+    if not masks_a or not masks_b:
+        return np.zeros((len(masks_a), len(masks_b)), dtype=np.float64)
+    ious = coco_mask.iou(_as_rles(masks_a), _as_rles(masks_b), [0] * len(masks_b))
+    return np.asarray(ious, dtype=np.float64).reshape(len(masks_a), len(masks_b))
+
+
+def paired_iou(masks_a: MaskList, masks_b: MaskList) -> np.ndarray:
+    """IoU of masks_a[i] with masks_b[i] for each i, shape (N,)
+
+    All masks must have the same size.
+    """
+    if len(masks_a) != len(masks_b):
+        raise ValueError("masks_a and masks_b must have the same length")
+    if not masks_a:
+        return np.zeros(0, dtype=np.float64)
+    rles_a, rles_b = _as_rles(masks_a), _as_rles(masks_b)
+    return np.concatenate([
+        np.diag(iou_matrix(rles_a[start:start + PAIRED_IOU_BLOCK_SIZE],
+                           rles_b[start:start + PAIRED_IOU_BLOCK_SIZE]))
+        for start in range(0, len(rles_a), PAIRED_IOU_BLOCK_SIZE)
+    ])
+
+
+def merge_masks(masks: MaskList, intersect: bool = False) -> Optional[Dict[str, Any]]:
+    """Union (or intersection) of masks as one RLE dict, or None for no masks"""
+    if not masks:
+        return None
+    return _to_emitted(coco_mask.merge(_as_rles(masks), intersect=int(intersect)))
+
+
+def detect_mask_changes(
+    previous: MaskList,
+    current: MaskList,
+    iou_threshold: float = DEFAULT_CHANGE_IOU
+) -> Dict[int, Dict[str, Any]]:
+    """Compare the object masks of two frames.
+
+    Args:
+        previous: {"object_id", "mask"} entries of the earlier frame
+        current: {"object_id", "mask"} entries of the later frame
+        iou_threshold: Minimum IoU for an object to count as unchanged
+
+    Returns:
+        Dict mapping each object ID to {"status", "iou", "area_delta"}, where
+        status is "added", "removed", "changed" or "unchanged"; iou is None
+        for added and removed objects
+    """
+    previous_by_id = {entry["object_id"]: entry["mask"] for entry in previous}
+    current_by_id = {entry["object_id"]: entry["mask"] for entry in current}
+    common = [object_id for object_id in current_by_id if object_id in previous_by_id]
+
+    changes: Dict[int, Dict[str, Any]] = {}
+    if common:
+        before = [previous_by_id[object_id] for object_id in common]
+        after = [current_by_id[object_id] for object_id in common]
+        ious = paired_iou(before, after)
+        area_deltas = mask_areas(after) - mask_areas(before)
+        for object_id, iou, area_delta in zip(common, ious, area_deltas):
+            changes[object_id] = {
+                "status": "unchanged" if iou >= iou_threshold else "changed",
+                "iou": float(iou),
+                "area_delta": int(area_delta),
+            }
+
+    added = [object_id for object_id in current_by_id if object_id not in previous_by_id]
+    for object_id, area in zip(added, mask_areas([current_by_id[i] for i in added])):
+        changes[object_id] = {"status": "added", "iou": None, "area_delta": int(area)}
+    removed = [object_id for object_id in previous_by_id if object_id not in current_by_id]
+    for object_id, area in zip(removed, mask_areas([previous_by_id[i] for i in removed])):
+        changes[object_id] = {"status": "removed", "iou": None, "area_delta": -int(area)}
+    return changes
+
+
+def find_changed_frames(
+    frames: Sequence[tuple],
+    iou_threshold: float = DEFAULT_CHANGE_IOU
+) -> List[int]:
+    """Indices of the frames whose masks differ from the frame before.
+
+    Args:
+        frames: (frame_index, object_ids, masks_rle) results in frame order,
+            as yielded by InferenceAPI.propagate_in_video
+        iou_threshold: Minimum IoU for an object to count as unchanged
+
+    Returns:
+        List of frame indices; the first frame is always included
+    """
+    changed = []
+    previous = None
+    for frame_idx, _, masks_rle in frames:
+        if previous is None or any(
+            change["status"] != "unchanged"
+            for change in detect_mask_changes(previous, masks_rle, iou_threshold).values()
+        ):
+            changed.append(frame_idx)
+        previous = masks_rle
+    return changed
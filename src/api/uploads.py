@@ -0,0 +1,299 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Blueprint, Flask, jsonify, request
+
+from utils.paths import UPLOADS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Uploads in progress are streamed here until the page claims them
+PARTIAL_UPLOADS_DIR = UPLOADS_DIR / ".partial"
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+# Unfinished uploads older than this are removed when the server starts
+STALE_UPLOAD_AGE = 7 * 24 * 3600
+
+uploads_bp = Blueprint("uploads", __name__, url_prefix="/api/uploads")
+
+# Per-upload lock and the number of requests holding or waiting for it; the
+# entry is dropped when that count reaches zero, so the dict does not grow
+_upload_locks: Dict[str, List[Any]] = {}
+_upload_locks_guard = Lock()
+
+
+def register_upload_routes(server: Flask) -> None:
+    """Register the chunked upload endpoints on the Dash Flask server."""
+    PARTIAL_UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+    prune_stale_uploads()
+    server.register_blueprint(uploads_bp)
+
+
+@uploads_bp.post("")
+def create_upload():
+    """Start an upload.
+
+    Body: {"filename": str, "size": int, "chunk_size": int (optional)}
+    """
+    body = request.get_json(silent=True) or {}
+    filename = Path(str(body.get("filename") or "")).name
+    size = body.get("size")
+    chunk_size = body.get("chunk_size") or DEFAULT_CHUNK_SIZE
+
+    if not filename:
+        return _error("filename is required", 400)
+    if not isinstance(size, int) or size <= 0:
+        return _error("size must be a positive integer", 400)
+    if not isinstance(chunk_size, int) or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        return _error(f"chunk_size must be between 1 and {MAX_CHUNK_SIZE}", 400)
+
+    upload_id = uuid.uuid4().hex
+    meta = {
+        "upload_id": upload_id,
+        "filename": filename,
+        "size": size,
+        "chunk_size": chunk_size,
+        "offset": 0,
+        "chunk_hashes": [],
+        "complete": False,
+        "created_at": time.time(),
+    }
+    _part_path(upload_id).touch()
+    _save_meta(meta)
+    logger.info(f"Started upload {upload_id} for {filename} ({size} bytes)")
+    return jsonify(_status(meta)), 201
+
+
+@uploads_bp.get("/<upload_id>")
+def get_upload(upload_id: str):
+    """Report how many bytes were received, so a client can resume from there."""
+    with _upload_lock(upload_id):
+        meta = _load_meta(upload_id)
+        if meta is None:
+            return _error("upload not found", 404)
+        return jsonify(_status(meta))
+
+
+@uploads_bp.put("/<upload_id>")
+def put_chunk(upload_id: str):
+    """Append one chunk, streamed from the raw request body.
+
+    Headers: Upload-Offset (byte offset of the chunk), X-Chunk-SHA256 (hex digest
+    of the chunk, optional when the client cannot hash). A chunk for the wrong
+    offset is rejected with 409 and the current offset so the client can resume.
+    """
+    with _upload_lock(upload_id):
+        meta = _load_meta(upload_id)
+        if meta is None:
+            return _error("upload not found", 404)
+        if meta["complete"]:
+            return _error("upload already completed", 409, offset=meta["offset"])
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+        except ValueError:
+            return _error("Upload-Offset header is required", 400)
+        if offset != meta["offset"]:
+            return _error("offset mismatch", 409, offset=meta["offset"])
+
+        max_length = min(meta["chunk_size"], meta["size"] - offset)
+        digest = hashlib.sha256()
+        written = 0
+        part_path = _part_path(upload_id)
+        with open(part_path, "r+b") as f:
+            f.seek(offset)
+            while True:
+                block = request.stream.read(STREAM_BLOCK_SIZE)
+                if not block:
+                    break
+                written += len(block)
+                if written > max_length:
+                    f.truncate(offset)
+                    return _error("chunk is larger than expected", 413, offset=offset)
+                digest.update(block)
+                f.write(block)
+
+            expected = request.headers.get("X-Chunk-SHA256")
+            is_last = offset + written == meta["size"]
+            if written == 0 or (written != meta["chunk_size"] and not is_last):
+                f.truncate(offset)
+                return _error("incomplete chunk", 400, offset=offset)
+            if expected is not None and expected.lower() != digest.hexdigest():
+                f.truncate(offset)
+                return _error("chunk checksum mismatch", 422, offset=offset)
+
+        meta["offset"] = offset + written
+        meta["chunk_hashes"].append(digest.hexdigest())
+        _save_meta(meta)
+        return jsonify(_status(meta))
+
+
+@uploads_bp.post("/<upload_id>/complete")
+def complete_upload(upload_id: str):
+    """Finish an upload after verifying its checksum.
+
+    Body: {"checksum": str}, the hex SHA-256 of the concatenated binary SHA-256
+    digests of every chunk, in order. Clients that cannot hash (browsers
+    outside a secure context) must send {"unverified": true} instead; a
+    request with neither is rejected.
+    """
+    body = request.get_json(silent=True) or {}
+    with _upload_lock(upload_id):
+        meta = _load_meta(upload_id)
+        if meta is None:
+            return _error("upload not found", 404)
+        if meta["offset"] != meta["size"]:
+            return _error("upload is missing data", 409, offset=meta["offset"])
+
+        checksum = body.get("checksum")
+        if checksum is None:
+            if body.get("unverified") is not True:
+                return _error("checksum is required", 400, offset=meta["offset"])
+            logger.warning(f"Upload {upload_id} completed without a checksum")
+        elif str(checksum).lower() != _combined_checksum(meta):
+            return _error("checksum mismatch", 422, offset=meta["offset"])
+
+        meta["complete"] = True
+        _save_meta(meta)
+        logger.info(f"Completed upload {upload_id} ({meta['size']} bytes)")
+        return jsonify(_status(meta))
+
+
+@uploads_bp.delete("/<upload_id>")
+def delete_upload(upload_id: str):
+    """Abort an upload and remove its data."""
+    with _upload_lock(upload_id):
+        if not discard_upload(upload_id):
+            return _error("upload not found", 404)
+        return "", 204
+
+
+def get_completed_upload(upload_id: str) -> Optional[Dict[str, Any]]:
+    """Get a finished upload's metadata, including the path of its data file."""
+    meta = _load_meta(upload_id)
+    if meta is None or not meta["complete"]:
+        return None
+    return {**_status(meta), "path": _part_path(upload_id)}
+
+
+def claim_upload(upload_id: str, destination: Path) -> Path:
+    """Move a finished upload to its final location without copying it.
+
+    Raises:
+        ValueError: If the upload does not exist or is not complete
+    """
+    with _upload_lock(upload_id):
+        upload = get_completed_upload(upload_id)
+        if upload is None:
+            raise ValueError(f"Upload {upload_id} not found or not complete")
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(upload["path"], destination)
+        _meta_path(upload_id).unlink(missing_ok=True)
+        return destination
+
+
+def discard_upload(upload_id: str) -> bool:
+    """Remove an upload and its data. Returns False if it does not exist."""
+    meta_path = _meta_path(upload_id)
+    if not meta_path.exists():
+        return False
+    _part_path(upload_id).unlink(missing_ok=True)
+    meta_path.unlink(missing_ok=True)
+    return True
+
+
+def prune_stale_uploads(max_age: float = STALE_UPLOAD_AGE) -> int:
+    """Remove uploads not touched for `max_age` seconds. Returns how many were removed."""
+    removed = 0
+    cutoff = time.time() - max_age
+    for meta_path in PARTIAL_UPLOADS_DIR.glob("*.json"):
+        if meta_path.stat().st_mtime < cutoff:
+            discard_upload(meta_path.stem)
+            removed += 1
+    return removed
+
+
+def _status(meta: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "upload_id": meta["upload_id"],
+        "filename": meta["filename"],
+        "size": meta["size"],
+        "chunk_size": meta["chunk_size"],
+        "offset": meta["offset"],
+        "complete": meta["complete"],
+    }
+
+
+def _combined_checksum(meta: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    for chunk_hash in meta["chunk_hashes"]:
+        digest.update(bytes.fromhex(chunk_hash))
+    return digest.hexdigest()
+
+
+def _error(message: str, status: int, **extra: Any):
+    return jsonify({"error": message, **extra}), status
+
+
+@contextmanager
+def _upload_lock(upload_id: str) -> Iterator[None]:
+    with _upload_locks_guard:
+        entry = _upload_locks.setdefault(upload_id, [Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _upload_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _upload_locks[upload_id]
+
+
+def _is_valid_id(upload_id: str) -> bool:
+    return len(upload_id) == 32 and all(c in "0123456789abcdef" for c in upload_id)
+
+
+def _part_path(upload_id: str) -> Path:
+    return PARTIAL_UPLOADS_DIR / f"{upload_id}.part"
+
+
+def _meta_path(upload_id: str) -> Path:
+    return PARTIAL_UPLOADS_DIR / f"{upload_id}.json"
+
+
+def _load_meta(upload_id: str) -> Optional[Dict[str, Any]]:
+    if not _is_valid_id(upload_id):
+        return None
+    try:
+        with open(_meta_path(upload_id)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    # Drop bytes written after the last recorded chunk, e.g. by an interrupted request
+    part_path = _part_path(upload_id)
+    if part_path.exists() and part_path.stat().st_size != meta["offset"]:
+        with open(part_path, "r+b") as f:
+            f.truncate(meta["offset"])
+    return meta
+
+
+def _save_meta(meta: Dict[str, Any]) -> None:
+    meta_path = _meta_path(meta["upload_id"])
+    tmp_path = meta_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
@@ -0,0 +1,120 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db import DatabaseAPI
+
+logger = logging.getLogger(__name__)
+
+# How long the writer keeps collecting points after the first one of a batch
+WRITE_BEHIND_INTERVAL = 0.005
+
+# Upper bound on the points committed in one batch
+WRITE_BEHIND_MAX_BATCH = 500
+
+
+class PointWriter:
+    """Single background thread persisting object points in batches.
+
+    Clicks queue their points here and return at once; the writer commits
+    everything queued within WRITE_BEHIND_INTERVAL of the first point in one
+    transaction per video. Pending points are flushed when the process exits
+    cleanly, and flush() waits for them on demand (before exports or reads
+    that must see every click).
+    """
+
+    def __init__(self, interval: float = WRITE_BEHIND_INTERVAL,
+                 max_batch: int = WRITE_BEHIND_MAX_BATCH) -> None:
+        self.interval = interval
+        self.max_batch = max_batch
+        self.failed = 0
+        self._queue: "queue.Queue[Optional[Tuple[int, Dict[str, Any]]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _start(self) -> None:
+        # Started on first use so importing the module has no side effects
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The point writer is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="point-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def submit(self, video_id: int, point: Dict[str, Any]) -> None:
+        """Queue a point for writing.
+
+        Args:
+            video_id: Database ID of the video the point belongs to
+            point: Dict with object_id, point_label_id, x, y and frame_idx
+        """
+        self._start()
+        self._queue.put((video_id, point))
+
+    def flush(self) -> None:
+        """Block until every point queued so far has been written (or has failed)."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self) -> None:
+        """Write the pending points and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch: List[Tuple[int, Dict[str, Any]]] = []
+            done_items = 1
+            if item is None:
+                stopping = True
+            else:
+                batch.append(item)
+
+            # Gather whatever else arrives shortly after the first point
+            deadline = time.monotonic() + self.interval
+            while not stopping and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                done_items += 1
+                if item is None:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            try:
+                self._write(batch)
+            finally:
+                for _ in range(done_items):
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Tuple[int, Dict[str, Any]]]) -> None:
+        points_by_video: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for video_id, point in batch:
+            points_by_video[video_id].append(point)
+        for video_id, points in points_by_video.items():
+            try:
+                DatabaseAPI.create_object_points_bulk(video_id, points)
+            except Exception as e:
+                self.failed += len(points)
+                logger.error(f"Failed to write {len(points)} object points for video {video_id}: {e}")
+
+
+# Create a singleton instance shared by all CoreAPI sessions
+point_writer = PointWriter()
@@ -0,0 +1,213 @@
+import logging
+import os
+import shutil
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from utils.mask_archive import MaskArchiveReader
+from utils.paths import get_detection_labels_path, get_mask_archive_path
+from .db import DatabaseAPI
+
+logger = logging.getLogger(__name__)
+
+# Threads writing label files
+EXPORT_WRITE_WORKERS = int(os.environ.get("EASYSAM_EXPORT_WRITE_WORKERS", "4"))
+
+# Label files handed to a writer thread at once
+EXPORT_WRITE_BATCH_SIZE = 256
+
+# Class names, one per line in class index order, next to the label files
+CLASSES_FILE_NAME = "classes.txt"
+
+# A frame to label: (file stem, class index per mask, (N, H, W) mask stack)
+LabelFrame = Tuple[str, np.ndarray, np.ndarray]
+
+
+def yolo_boxes(masks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Normalized YOLO boxes of a stack of masks.
+
+    Instead of a contour search per object, one reduction over the whole
+    stack finds the rows every mask occupies; columns are then reduced only
+    over the band of rows each mask spans.
+
+    Args:
+        masks: (N, H, W) binary masks, bool or 0/1 uint8
+
+    Returns:
+        Tuple of ((N, 4) float array of center x, center y, width, height,
+        all relative to the frame size, (N,) bool array marking the
+        non-empty masks); boxes of empty masks are meaningless
+    """
+    count, height, width = masks.shape
+    # A bool view of 0/1 masks avoids copying the stack
+    masks = masks.view(bool) if masks.dtype == np.uint8 else masks.astype(bool, copy=False)
+    rows = masks.any(axis=2)
+    present = rows.any(axis=1)
+    top = rows.argmax(axis=1)
+    bottom = height - rows[:, ::-1].argmax(axis=1)
+
+    cols = np.zeros((count, width), dtype=bool)
+    for i in np.flatnonzero(present):
+        cols[i] = masks[i, top[i]:bottom[i]].any(axis=0)
+    left = cols.argmax(axis=1)
+    right = width - cols[:, ::-1].argmax(axis=1)
+    boxes = np.stack([
+        (left + right) / (2 * width),
+        (top + bottom) / (2 * height),
+        (right - left) / width,
+        (bottom - top) / height,
+    ], axis=1)
+    return boxes, present
+
+
+def format_yolo_labels(class_indices: np.ndarray, masks: np.ndarray) -> str:
+    """YOLO label file contents for the masks of one frame (empty masks are skipped)"""
+    if not len(masks):
+        return ""
+    boxes, present = yolo_boxes(masks)
+    return "".join(
+        f"{class_index} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n"
+        for class_index, (x, y, w, h) in zip(class_indices[present], boxes[present])
+    )
+
+
+def replace_directory(tmp_dir: Path, output_dir: Path) -> None:
+    """Move a completed tmp_dir to output_dir, removing what was there before."""
+    old_dir = output_dir.with_name(output_dir.name + ".old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if output_dir.exists():
+        os.replace(output_dir, old_dir)
+    os.replace(tmp_dir, output_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _write_files(files: List[Tuple[Path, str]]) -> None:
+    for path, text in files:
+        with open(path, "w") as f:
+            f.write(text)
+
+
+def write_yolo_labels(
+    frames: Iterable[LabelFrame],
+    output_dir: Union[str, Path],
+    workers: int = EXPORT_WRITE_WORKERS,
+    include_empty_frames: bool = True
+) -> Dict[str, int]:
+    """Write one YOLO label file per frame into output_dir.
+
+    Boxes are computed in the calling thread and the files are written in
+    batches by a thread pool. At most two batches per worker are pending, so
+    memory stays bounded however many frames there are.
+
+    Args:
+        frames: (file stem, class indices, (N, H, W) masks) per frame
+        output_dir: Existing directory to write the label files to
+        workers: Number of writer threads
+        include_empty_frames: Whether to write empty files for frames without
+            objects (background images for YOLO training)
+
+    Returns:
+        Dict with frames (label files written) and boxes counts
+    """
+    output_dir = Path(output_dir)
+    frame_count = box_count = 0
+    batch: List[Tuple[Path, str]] = []
+    pending: Set[Future] = set()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yolo-export") as pool:
+        def submit(files: List[Tuple[Path, str]]) -> None:
+            nonlocal pending
+            while len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+            pending.add(pool.submit(_write_files, files))
+
+        for stem, class_indices, masks in frames:
+            text = format_yolo_labels(np.asarray(class_indices), masks)
+            if not text and not include_empty_frames:
+                continue
+            batch.append((output_dir / f"{stem}.txt", text))
+            frame_count += 1
+            box_count += text.count("\n")
+            if len(batch) >= EXPORT_WRITE_BATCH_SIZE:
+                submit(batch)
+                batch = []
+        if batch:
+            submit(batch)
+        for future in pending:
+            future.result()
+
+    return {"frames": frame_count, "boxes": box_count}
+
+
+def export_yolo(
+    video_id: int,
+    output_dir: Optional[Union[str, Path]] = None,
+    include_empty_frames: bool = True,
+    workers: int = EXPORT_WRITE_WORKERS
+) -> Dict[str, Any]:
+    """Export the stored masks of a video as YOLO detection labels.
+
+    Writes one `<frame file stem>.txt` per extracted frame, with a
+    `class cx cy w h` line (normalized to the frame size) per object, and
+    classes.txt listing the objects of the project in class index order.
+    The labels are written to a fresh directory that replaces the previous
+    export once complete, so no stale files are left behind.
+
+    Args:
+        video_id: Database ID of the video
+        output_dir: Destination directory (default: get_detection_labels_path)
+        include_empty_frames: Whether to write empty files for frames without masks
+        workers: Number of writer threads
+
+    Returns:
+        Dict with path, frames and boxes (counts)
+
+    Raises:
+        ValueError: If the video does not exist
+        FileNotFoundError: If no masks have been stored for the video
+    """
+    video = DatabaseAPI.get_video(video_id)
+    if video is None:
+        raise ValueError(f"Video {video_id} does not exist")
+    archive_path = get_mask_archive_path(video.name)
+    if not archive_path.exists():
+        raise FileNotFoundError(f"No stored masks for video {video_id}: {archive_path} does not exist")
+
+    output_dir = Path(output_dir) if output_dir else get_detection_labels_path(video.name)
+    tmp_dir = output_dir.with_name(output_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    objects = sorted(DatabaseAPI.get_objects_by_project(video.project_id), key=lambda obj: obj.id)
+    class_indices = {obj.id: index for index, obj in enumerate(objects)}
+
+    def frames(reader: MaskArchiveReader) -> Iterable[LabelFrame]:
+        empty = np.zeros((0, video.height, video.width), dtype=np.uint8)
+        for _, _, frame_idx, _, _, path, _ in DatabaseAPI.iter_frames_by_video(video_id, rows="tuples"):
+            masks = {object_id: mask for object_id, mask in reader.get_masks(frame_idx).items()
+                     if object_id in class_indices}
+            yield (
+                Path(path).stem,
+                np.array([class_indices[object_id] for object_id in masks], dtype=np.int64),
+                np.stack(list(masks.values())) if masks else empty,
+            )
+
+    try:
+        with open(tmp_dir / CLASSES_FILE_NAME, "w") as f:
+            f.write("".join(f"{obj.name}\n" for obj in objects))
+        with MaskArchiveReader(archive_path) as reader:
+            result = write_yolo_labels(frames(reader), tmp_dir, workers, include_empty_frames)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    replace_directory(tmp_dir, output_dir)
+
+    logger.info(f"Exported {result['boxes']} boxes on {result['frames']} frames of "
+                f"video {video_id} to {output_dir}")
+    return {"path": output_dir, **result}
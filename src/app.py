@@ -1,6 +1,9 @@
 import dash
 from dash import Dash, html, dcc
 from components.navbar import create_navbar
+from api.uploads import register_upload_routes
+from api.frame_server import register_frame_routes
+from db.migrations import migrate_database
 
 app = Dash(__name__,
            use_pages=True,
@@ -11,6 +14,13 @@ app = Dash(__name__,
                "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css"
            ])
 
+# Add tables and indexes introduced since the database file was created
+migrate_database()
+
+# Server endpoints used by the pages
+register_upload_routes(app.server)
+register_frame_routes(app.server)
+
 app.layout = html.Div([
     create_navbar(),
 
@@ -0,0 +1,201 @@
+/*
+ * Resumable chunked uploads for the chunked_dropzone component.
+ *
+ * Files dropped on (or picked from) an element with the "chunked-dropzone"
+ * class are streamed to /api/uploads as raw binary chunks. Each chunk carries
+ * its SHA-256, and the upload is completed with a checksum over all chunk
+ * digests. The upload id is remembered per file in localStorage, so a dropped
+ * connection or a page reload resumes from the last chunk the server stored.
+ * When done, the dcc.Store named by the zone's data-store-id receives
+ * {upload_id, filename, size}.
+ */
+(function () {
+    const API_URL = "/api/uploads";
+    const MAX_RETRIES = 5;
+
+    const hasSubtleCrypto = !!(window.crypto && window.crypto.subtle);
+
+    function toHex(bytes) {
+        return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+    }
+
+    async function sha256(buffer) {
+        return new Uint8Array(await window.crypto.subtle.digest("SHA-256", buffer));
+    }
+
+    function sleep(ms) {
+        return new Promise((resolve) => setTimeout(resolve, ms));
+    }
+
+    function storageKey(file) {
+        return `easysam-upload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    function setStatus(zone, text, percent) {
+        const status = zone.querySelector(".chunked-dropzone-status");
+        const bar = zone.querySelector(".chunked-dropzone-bar");
+        if (status) {
+            status.textContent = text;
+        }
+        if (bar && percent !== undefined) {
+            bar.parentElement.classList.remove("hidden");
+            bar.style.width = `${percent.toFixed(1)}%`;
+        }
+    }
+
+    async function requestJson(url, options) {
+        const response = await fetch(url, options);
+        const body = await response.json().catch(() => ({}));
+        return { ok: response.ok, status: response.status, body };
+    }
+
+    async function startOrResume(file, chunkSize) {
+        const savedId = localStorage.getItem(storageKey(file));
+        if (savedId) {
+            const saved = await requestJson(`${API_URL}/${savedId}`);
+            if (saved.ok && !saved.body.complete) {
+                return saved.body;
+            }
+        }
+
+        const created = await requestJson(API_URL, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ filename: file.name, size: file.size, chunk_size: chunkSize }),
+        });
+        if (!created.ok) {
+            throw new Error(created.body.error || `upload failed (${created.status})`);
+        }
+        localStorage.setItem(storageKey(file), created.body.upload_id);
+        return created.body;
+    }
+
+    async function sendChunk(uploadId, offset, buffer, digest) {
+        const headers = { "Content-Type": "application/octet-stream", "Upload-Offset": String(offset) };
+        if (digest) {
+            headers["X-Chunk-SHA256"] = toHex(digest);
+        }
+        for (let attempt = 0; ; attempt++) {
+            let response = null;
+            let body = {};
+            try {
+                response = await fetch(`${API_URL}/${uploadId}`, { method: "PUT", headers, body: buffer });
+                body = await response.json().catch(() => ({}));
+            } catch (error) {
+                if (attempt >= MAX_RETRIES) {
+                    throw error;
+                }
+            }
+            if (response) {
+                if (response.ok || response.status === 409) {
+                    // 409 means the server is elsewhere; continue from its offset
+                    return body.offset;
+                }
+                // Other client errors (e.g. a checksum mismatch) will not go away by retrying
+                if (response.status < 500 || attempt >= MAX_RETRIES) {
+                    throw new Error(body.error || `upload failed (${response.status})`);
+                }
+            }
+            // Connection dropped or server error: back off and ask where to resume
+            await sleep(500 * 2 ** attempt);
+            const status = await requestJson(`${API_URL}/${uploadId}`).catch(() => null);
+            if (status && status.ok && status.body.offset !== offset) {
+                return status.body.offset;
+            }
+        }
+    }
+
+    async function upload(zone, file) {
+        const storeId = zone.dataset.storeId;
+        const chunkSize = parseInt(zone.dataset.chunkSize, 10);
+
+        setStatus(zone, `Uploading ${file.name}...`, 0);
+        const state = await startOrResume(file, chunkSize);
+        const uploadId = state.upload_id;
+        const size = state.size;
+        const serverChunkSize = state.chunk_size;
+        const digests = [];
+        let offset = state.offset;
+
+        while (offset < size) {
+            const buffer = await file.slice(offset, Math.min(offset + serverChunkSize, size)).arrayBuffer();
+            const digest = hasSubtleCrypto ? await sha256(buffer) : null;
+            const nextOffset = await sendChunk(uploadId, offset, buffer, digest);
+            if (nextOffset === offset + buffer.byteLength) {
+                digests[offset / serverChunkSize] = digest;
+            }
+            offset = nextOffset;
+            setStatus(zone, `Uploading ${file.name}...`, (100 * offset) / size);
+        }
+
+        let checksum = null;
+        if (hasSubtleCrypto) {
+            // Hash chunks the server stored before a resume (or from an interrupted request)
+            const chunkCount = Math.ceil(size / serverChunkSize);
+            for (let index = 0; index < chunkCount; index++) {
+                if (!digests[index]) {
+                    const start = index * serverChunkSize;
+                    const buffer = await file.slice(start, Math.min(start + serverChunkSize, size)).arrayBuffer();
+                    digests[index] = await sha256(buffer);
+                }
+            }
+            const joined = new Uint8Array(digests.length * 32);
+            digests.forEach((digest, index) => joined.set(digest, index * 32));
+            checksum = toHex(await sha256(joined));
+        }
+        const completed = await requestJson(`${API_URL}/${uploadId}/complete`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            // Without SubtleCrypto the upload cannot be verified and has to say so
+            body: JSON.stringify(checksum ? { checksum } : { unverified: true }),
+        });
+        if (!completed.ok) {
+            localStorage.removeItem(storageKey(file));
+            throw new Error(completed.body.error || `upload failed (${completed.status})`);
+        }
+
+        localStorage.removeItem(storageKey(file));
+        setStatus(zone, `${file.name} uploaded`, 100);
+        window.dash_clientside.set_props(storeId, {
+            data: { upload_id: uploadId, filename: file.name, size: size },
+        });
+    }
+
+    function handleFiles(zone, files) {
+        if (!files || files.length === 0 || zone.dataset.uploading === "true") {
+            return;
+        }
+        zone.dataset.uploading = "true";
+        upload(zone, files[0])
+            .catch((error) => setStatus(zone, `Upload failed: ${error.message}`))
+            .finally(() => {
+                zone.dataset.uploading = "false";
+            });
+    }
+
+    document.addEventListener("click", (event) => {
+        const zone = event.target.closest(".chunked-dropzone");
+        if (!zone || zone.dataset.uploading === "true") {
+            return;
+        }
+        const input = document.createElement("input");
+        input.type = "file";
+        input.accept = zone.dataset.accept || "*";
+        input.addEventListener("change", () => handleFiles(zone, input.files));
+        input.click();
+    });
+
+    document.addEventListener("dragover", (event) => {
+        if (event.target.closest(".chunked-dropzone")) {
+            event.preventDefault();
+        }
+    });
+
+    document.addEventListener("drop", (event) => {
+        const zone = event.target.closest(".chunked-dropzone");
+        if (zone) {
+            event.preventDefault();
+            handleFiles(zone, event.dataTransfer.files);
+        }
+    });
+})();
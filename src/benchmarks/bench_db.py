@@ -0,0 +1,71 @@
+"""
+Benchmark of DatabaseAPI.create_object_point, the write behind every point click
+
+Usage (from the src directory):
+    python -m benchmarks.bench_db --points 2000 --threads 4
+
+Runs against a fresh database in a temporary directory, so the app's
+easysam.db is never touched.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def run_benchmark(points: int, threads: int) -> None:
+    from api.db import DatabaseAPI
+    from db.init import initialize_database
+
+    initialize_database()
+    project = DatabaseAPI.create_project("bench")
+    video = DatabaseAPI.create_video(project.id, "bench", "bench.mp4", "frames",
+                                     width=1920, height=1080, fps=30.0, duration=60.0)
+    obj = DatabaseAPI.create_object(project.id, "object", "#ff0000")
+    label_id = DatabaseAPI.get_all_point_labels()[0].id
+
+    def add_points(count: int, offset: int) -> None:
+        for i in range(count):
+            DatabaseAPI.create_object_point(obj.id, video.id, label_id,
+                                            x=i % 1920, y=i % 1080, frame_idx=offset + i)
+
+    started = time.perf_counter()
+    add_points(points, 0)
+    elapsed = time.perf_counter() - started
+    print(f"create_object_point, 1 thread: {points / elapsed:,.0f} ops/s "
+          f"({1000 * elapsed / points:.3f} ms/op)")
+
+    per_thread = points // threads
+    workers = [threading.Thread(target=add_points, args=(per_thread, (n + 1) * points))
+               for n in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    print(f"create_object_point, {threads} threads: {per_thread * threads / elapsed:,.0f} ops/s")
+
+    stored = len(DatabaseAPI.get_object_points_by_video(video.id))
+    print(f"{stored} points stored (expected {points + per_thread * threads})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=2000, help="Points to insert per run")
+    parser.add_argument("--threads", type=int, default=4, help="Threads in the concurrent run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The database path is relative, so this keeps the benchmark database out of the app
+        os.chdir(tmp_dir)
+        run_benchmark(args.points, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark of mask archives against independent per-frame COCO RLE
+
+Usage (from the src directory):
+    python -m benchmarks.bench_mask_archive --rle-jsonl propagation.jsonl
+    python -m benchmarks.bench_mask_archive --video clip.mp4 --objects 3
+    python -m benchmarks.bench_mask_archive --frames 600
+
+Masks come from saved propagation output (one JSON object per line with
+frame_idx, object_id and mask), from a real clip (each object is the Otsu
+foreground of one horizontal band of the frame, which follows the content
+of the video like a tracked mask does) or from synthetic moving ellipses.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+from pycocotools.mask import decode as decode_masks
+from pycocotools.mask import encode as encode_masks
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.mask_archive import MaskArchiveReader, MaskArchiveWriter, DEFAULT_KEYFRAME_INTERVAL  # noqa: E402
+
+Masks = Iterator[Tuple[int, int, np.ndarray]]
+
+
+def masks_from_jsonl(path: str) -> Masks:
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            rle = record["mask"]
+            yield record["frame_idx"], record["object_id"], decode_masks(
+                {"size": rle["size"], "counts": rle["counts"].encode()})
+
+
+def masks_from_video(path: str, objects: int) -> Masks:
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    frame_idx = 0
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        gray = cv2.GaussianBlur(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (9, 9), 0)
+        _, foreground = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        bands = np.array_split(np.arange(gray.shape[0]), objects)
+        for object_id, rows in enumerate(bands, start=1):
+            mask = np.zeros_like(foreground)
+            mask[rows] = foreground[rows]
+            yield frame_idx, object_id, mask
+        frame_idx += 1
+    capture.release()
+
+
+def synthetic_masks(frames: int, objects: int, height: int = 720, width: int = 1280) -> Masks:
+    yy, xx = np.mgrid[:height, :width]
+    for frame_idx in range(frames):
+        for object_id in range(1, objects + 1):
+            cx = (200 * object_id + 2.5 * frame_idx) % width
+            cy = height / 2 + 150 * np.sin(frame_idx / 40 + object_id)
+            rx, ry = 60 + 10 * object_id, 40 + 5 * np.cos(frame_idx / 15)
+            yield frame_idx, object_id, (((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2 < 1).astype(np.uint8)
+
+
+def run_benchmark(masks: Masks, keyframe_interval: int) -> None:
+    per_frame: Dict[Tuple[int, int], Dict[str, str]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_path = Path(tmp_dir) / "masks.ezma"
+        writer = None
+        write_time = 0.0
+        for frame_idx, object_id, mask in masks:
+            rle = encode_masks(np.asfortranarray(mask, dtype=np.uint8))
+            per_frame[(frame_idx, object_id)] = {"size": rle["size"], "counts": rle["counts"].decode()}
+            if writer is None:
+                writer = MaskArchiveWriter(archive_path, *mask.shape, keyframe_interval=keyframe_interval)
+            started = time.perf_counter()
+            writer.add(frame_idx, object_id, mask)
+            write_time += time.perf_counter() - started
+        started = time.perf_counter()
+        writer.close()
+        write_time += time.perf_counter() - started
+
+        # Per-frame RLE as the app stores it today: JSON records of {frame_idx, object_id, mask}
+        rle_json = json.dumps([{"frame_idx": f, "object_id": o, "mask": m}
+                               for (f, o), m in per_frame.items()]).encode()
+        rle_size = len(rle_json)
+        rle_zlib_size = len(zlib.compress(rle_json, 6))
+        archive_size = archive_path.stat().st_size
+
+        started = time.perf_counter()
+        for rle in per_frame.values():
+            decode_masks({"size": rle["size"], "counts": rle["counts"].encode()})
+        rle_decode_time = time.perf_counter() - started
+
+        with MaskArchiveReader(archive_path) as reader:
+            started = time.perf_counter()
+            decoded = sum(len(frame_masks) for _, frame_masks in reader.iter_frames())
+            sequential_time = time.perf_counter() - started
+
+        with MaskArchiveReader(archive_path) as reader:
+            keys = list(per_frame)
+            random.Random(0).shuffle(keys)
+            keys = keys[:500]
+            started = time.perf_counter()
+            for frame_idx, object_id in keys:
+                reader.get_mask(frame_idx, object_id)
+            random_time = (time.perf_counter() - started) / len(keys)
+
+            frame_idx, object_id = keys[0]
+            expected = decode_masks({"size": per_frame[keys[0]]["size"],
+                                     "counts": per_frame[keys[0]]["counts"].encode()})
+            assert (reader.get_mask(frame_idx, object_id) == expected).all()
+
+    count = len(per_frame)
+    print(f"{count} masks of {per_frame[keys[0]]['size'][1]}x{per_frame[keys[0]]['size'][0]}, "
+          f"keyframe interval {keyframe_interval}")
+    print(f"per-frame RLE JSON:   {rle_size / 1024:10.1f} KiB")
+    print(f"per-frame RLE + zlib: {rle_zlib_size / 1024:10.1f} KiB")
+    print(f"mask archive:         {archive_size / 1024:10.1f} KiB "
+          f"(RLE JSON / archive {rle_size / archive_size:.2f}, "
+          f"zlib'd RLE JSON / archive {rle_zlib_size / archive_size:.2f})")
+    print(f"archive write:        {count / write_time:10.0f} masks/s")
+    print(f"per-frame RLE decode: {count / rle_decode_time:10.0f} masks/s")
+    print(f"archive sequential:   {decoded / sequential_time:10.0f} masks/s")
+    print(f"archive random:       {1000 * random_time:10.2f} ms/mask")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--rle-jsonl", help="Saved propagation output")
+    source.add_argument("--video", help="Clip to derive masks from")
+    parser.add_argument("--frames", type=int, default=600, help="Frames of synthetic masks")
+    parser.add_argument("--objects", type=int, default=3, help="Objects per frame (clip and synthetic)")
+    parser.add_argument("--keyframe-interval", type=int, default=DEFAULT_KEYFRAME_INTERVAL)
+    args = parser.parse_args()
+
+    if args.rle_jsonl:
+        masks = masks_from_jsonl(args.rle_jsonl)
+    elif args.video:
+        masks = masks_from_video(args.video, args.objects)
+    else:
+        masks = synthetic_masks(args.frames, args.objects)
+    run_benchmark(masks, args.keyframe_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark of reopening a video that already has stored clicks
+
+Usage (from the src directory, with the SAM2 checkpoints in place):
+    python -m benchmarks.bench_restore --video-id 1 --clicks 1000 --model-size tiny
+
+Adds temporary objects with synthetic clicks to an extracted video, then
+compares CoreAPI's batched restore with replaying the clicks one add_points
+call at a time. The temporary objects and their points are deleted afterwards.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Clicks are spread over this many objects and the first frames of the video
+BENCH_OBJECTS = 5
+BENCH_FRAMES = 50
+
+
+def run_benchmark(video_id: int, clicks: int, model_size: str) -> None:
+    from api.core import CoreAPI
+    from api.db import DatabaseAPI
+
+    video = DatabaseAPI.get_video(video_id)
+    if video is None:
+        raise SystemExit(f"Video {video_id} not found")
+    labels = {label.type: label.id for label in DatabaseAPI.get_all_point_labels()}
+    frame_count = len(DatabaseAPI.get_frames_by_video(video_id)) or BENCH_FRAMES
+
+    objects = [DatabaseAPI.create_object(video.project_id, f"bench-restore-{n}", "#ff00ff")
+               for n in range(BENCH_OBJECTS)]
+    rng = random.Random(0)
+    points = [
+        {
+            "object_id": rng.choice(objects).id,
+            "frame_idx": rng.randrange(min(frame_count, BENCH_FRAMES)),
+            "x": rng.randrange(video.width),
+            "y": rng.randrange(video.height),
+            "point_label_id": labels["positive"] if rng.random() < 0.8 else labels["negative"],
+        }
+        for _ in range(clicks)
+    ]
+    try:
+        DatabaseAPI.create_object_points_bulk(video_id, points)
+
+        started = time.perf_counter()
+        core = CoreAPI(video_id, model_size=model_size, restore_points=False)
+        session_time = time.perf_counter() - started
+        try:
+            started = time.perf_counter()
+            restored = core.restore_object_points()
+            restore_time = time.perf_counter() - started
+        finally:
+            core.close()
+
+        core = CoreAPI(video_id, model_size=model_size, restore_points=False)
+        try:
+            started = time.perf_counter()
+            for frame_idx, object_id, x, y, label_type in DatabaseAPI.get_object_point_prompts(video_id):
+                core.inference_api.add_points(
+                    session_id=core.session_id,
+                    frame_index=frame_idx,
+                    object_id=object_id,
+                    points=[[x, y]],
+                    labels=[1 if label_type == "positive" else 0],
+                    clear_old_points=False
+                )
+            replay_time = time.perf_counter() - started
+        finally:
+            core.close()
+    finally:
+        for obj in objects:
+            DatabaseAPI.delete_object(obj.id)
+
+    print(f"session start: {session_time:.2f}s")
+    print(f"batched restore of {restored} points: {restore_time:.2f}s "
+          f"(reopen total {session_time + restore_time:.2f}s)")
+    print(f"per-click replay: {replay_time:.2f}s "
+          f"(reopen total {session_time + replay_time:.2f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video-id", type=int, required=True, help="Extracted video to reopen")
+    parser.add_argument("--clicks", type=int, default=1000, help="Stored clicks to restore")
+    parser.add_argument("--model-size", default="tiny", help="SAM2 model size")
+    args = parser.parse_args()
+    run_benchmark(args.video_id, args.clicks, args.model_size)
+
+
+if __name__ == "__main__":
+    main()
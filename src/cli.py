@@ -0,0 +1,332 @@
+"""
+Command line bulk ingest for videos that are already on local or network storage
+
+Usage (from the src directory):
+    python cli.py ingest /mnt/nas/videos/*.mp4 --project "Site A" --frame-step 4
+    python cli.py watch /mnt/nas/incoming --project "Site A" --interval 30
+    python cli.py check-db
+    python cli.py export-coco 12 --output /data/exports/clip12.json
+    python cli.py export-yolo 12
+    python cli.py build-dataset --project "Site A" --workers 8
+    python cli.py render-overlay 12 --alpha 0.4
+
+Videos are referenced in place, never copied. Probing and frame extraction run
+in a process pool; database writes stay in the main process.
+"""
+import argparse
+import hashlib
+import logging
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from api.coco_export import export_coco
+from api.dataset import DEFAULT_TEST_FRACTION, DEFAULT_VAL_FRACTION, build_project_dataset
+from api.db import DatabaseAPI
+from api.render import DEFAULT_OVERLAY_ALPHA, render_overlay_video
+from api.yolo_export import export_yolo
+from api.ingest import extract_video_file, register_extracted_videos
+from db.migrations import check_query_plans
+
+logger = logging.getLogger("easysam.cli")
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv", ".m4v", ".webm"}
+
+# Hex characters of the path hash in the names of ingested videos
+VIDEO_NAME_HASH_LENGTH = 8
+
+# Extracted videos registered per database transaction by the ingest command
+REGISTER_BATCH_SIZE = 16
+
+
+class ThroughputMeter:
+    """Counts ingested videos and frames and reports the rate"""
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.videos = 0
+        self.frames = 0
+        self.failures = 0
+
+    def add(self, frames: int) -> None:
+        self.videos += 1
+        self.frames += frames
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return (
+            f"{self.videos} videos ({self.frames} frames, {self.failures} failed) "
+            f"in {elapsed:.1f}s: {self.videos * 3600 / elapsed:.1f} videos/hour, "
+            f"{self.frames / elapsed:.1f} frames/s"
+        )
+
+
+def find_videos(paths: Iterable[str]) -> List[Path]:
+    """Expand files and directories (recursively) into a sorted list of video files."""
+    videos = set()
+    for path in map(Path, paths):
+        if path.is_dir():
+            videos.update(p for p in path.rglob("*")
+                          if p.is_file() and p.suffix.lower() in VIDEO_EXTENSIONS)
+        elif path.is_file():
+            videos.add(path)
+        else:
+            logger.warning(f"Skipping {path}: not found")
+    return sorted(p.resolve() for p in videos)
+
+
+def video_name_for(video_path: Path) -> str:
+    """Name a video after its parent folder and file stem, with a short hash of
+    its resolved path so that no two files share a name (and frame directory)."""
+    base = f"{video_path.parent.name}_{video_path.stem}" if video_path.parent.name else video_path.stem
+    path_hash = hashlib.sha256(str(video_path.resolve()).encode()).hexdigest()[:VIDEO_NAME_HASH_LENGTH]
+    return f"{base}_{path_hash}"
+
+
+def submit_videos(pool: ProcessPoolExecutor, videos: Iterable[Path], frame_step: int) -> Dict[Future, Path]:
+    futures = {}
+    for video_path in videos:
+        if DatabaseAPI.get_video_by_file_path(str(video_path)) is not None:
+            logger.info(f"Skipping {video_path}: already ingested")
+            continue
+        future = pool.submit(extract_video_file, str(video_path),
+                             video_name_for(video_path), frame_step)
+        futures[future] = video_path
+    return futures
+
+
+def collect(finished: List[Tuple[Future, Path]], project_id: int, meter: ThroughputMeter) -> List[Path]:
+    """Register a batch of finished extractions in one transaction.
+
+    Returns:
+        List[Path]: The videos that failed to extract or register
+    """
+    results, video_paths, failed = [], [], []
+    for future, video_path in finished:
+        try:
+            results.append(future.result())
+            video_paths.append(video_path)
+        except Exception as e:
+            meter.failures += 1
+            failed.append(video_path)
+            logger.error(f"Failed to ingest {video_path}: {e}")
+    if not results:
+        return failed
+
+    try:
+        videos = register_extracted_videos(results, project_id)
+    except Exception as e:
+        meter.failures += len(results)
+        logger.error(f"Failed to register {len(results)} videos: {e}")
+        return failed + video_paths
+    for video, result, video_path in zip(videos, results, video_paths):
+        meter.add(len(result["frames"]))
+        logger.info(f"Ingested {video_path} as video {video.id} ({len(result['frames'])} frames)")
+    logger.info(meter.report())
+    return failed
+
+
+def run_ingest(args: argparse.Namespace) -> int:
+    project_id = DatabaseAPI.get_or_create_project(args.project).id
+    videos = find_videos(args.paths)
+    logger.info(f"Found {len(videos)} videos")
+
+    meter = ThroughputMeter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = submit_videos(pool, videos, args.frame_step)
+        finished = []
+        for future in as_completed(futures):
+            finished.append((future, futures[future]))
+            if len(finished) >= REGISTER_BATCH_SIZE:
+                collect(finished, project_id, meter)
+                finished = []
+        collect(finished, project_id, meter)
+
+    print(meter.report())
+    return 1 if meter.failures else 0
+
+
+def run_watch(args: argparse.Namespace) -> int:
+    project_id = DatabaseAPI.get_or_create_project(args.project).id
+    watch_dir = Path(args.directory)
+    logger.info(f"Watching {watch_dir} every {args.interval}s")
+
+    meter = ThroughputMeter()
+    # Files are only picked up once their size and mtime stop changing between polls
+    last_seen: Dict[Path, Tuple[int, int]] = {}
+    in_flight: Dict[Future, Path] = {}
+    queued = set()
+    # Signature of failed files when they failed; they are retried once it changes
+    failed: Dict[Path, Tuple[int, int]] = {}
+
+    def collect_failed(finished: List[Tuple[Future, Path]]) -> None:
+        for video_path in collect(finished, project_id, meter):
+            queued.discard(video_path)
+            failed[video_path] = last_seen[video_path]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        try:
+            while True:
+                stable = []
+                for video_path in find_videos([watch_dir]):
+                    if video_path in queued:
+                        continue
+                    stat = video_path.stat()
+                    signature = (stat.st_size, stat.st_mtime_ns)
+                    if failed.get(video_path) == signature:
+                        continue
+                    if last_seen.get(video_path) == signature:
+                        stable.append(video_path)
+                        failed.pop(video_path, None)
+                    last_seen[video_path] = signature
+
+                new_futures = submit_videos(pool, stable, args.frame_step)
+                in_flight.update(new_futures)
+                queued.update(stable)
+
+                collect_failed([(future, in_flight.pop(future)) for future in list(in_flight)
+                                if future.done()])
+
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            logger.info("Stopping; waiting for running extractions")
+            collect_failed([(future, in_flight[future]) for future in as_completed(in_flight)])
+
+    print(meter.report())
+    return 0
+
+
+def run_check_db(args: argparse.Namespace) -> int:
+    failed = 0
+    for result in check_query_plans():
+        status = "ok" if result["ok"] else "FULL SCAN"
+        failed += not result["ok"]
+        print(f"{status:9} {result['name']}: {'; '.join(result['plan'])}")
+    return 1 if failed else 0
+
+
+def run_export_coco(args: argparse.Namespace) -> int:
+    try:
+        result = export_coco(args.video_id, args.output, include_empty=args.include_empty)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Cannot export video {args.video_id}: {e}")
+        return 1
+    print(f"{result['annotations']} annotations on {result['images']} frames written to {result['path']}")
+    return 0
+
+
+def run_export_yolo(args: argparse.Namespace) -> int:
+    try:
+        result = export_yolo(args.video_id, args.output, include_empty_frames=not args.skip_empty)
+    except (ValueError, FileNotFoundError) as e:
+        logger.error(f"Cannot export video {args.video_id}: {e}")
+        return 1
+    print(f"{result['boxes']} boxes on {result['frames']} frames written to {result['path']}")
+    return 0
+
+
+def run_build_dataset(args: argparse.Namespace) -> int:
+    project = next((p for p in DatabaseAPI.get_all_projects() if p.name == args.project), None)
+    if project is None:
+        logger.error(f"Project {args.project!r} does not exist")
+        return 1
+    result = build_project_dataset(project.id, workers=args.workers, force=args.force,
+                                   val_fraction=args.val, test_fraction=args.test, seed=args.seed)
+    splits = ", ".join(f"{count} {split}" for split, count in result["splits"].items())
+    print(f"{result['videos']} videos ({splits}), {result['rebuilt']} rebuilt, "
+          f"{result['failed']} failures: {result['path']}")
+    return 1 if result["failed"] else 0
+
+
+def run_render_overlay(args: argparse.Namespace) -> int:
+    try:
+        video = render_overlay_video(args.video_id, model=args.model, alpha=args.alpha)
+    except (ValueError, FileNotFoundError, RuntimeError) as e:
+        logger.error(f"Cannot render video {args.video_id}: {e}")
+        return 1
+    print(f"Rendered video {video.id} ({video.name}) to {video.file_path}")
+    return 0
+
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be >= 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {number}")
+    return number
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="easysam", description="Bulk ingest videos into EasySAM")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--project", default="Default", help="Project to add the videos to")
+    common.add_argument("--frame-step", type=positive_int, default=4, help="Keep one frame every N frames")
+    common.add_argument("--workers", type=int, default=None,
+                        help="Extraction processes (default: CPU count)")
+
+    ingest_parser = subparsers.add_parser("ingest", parents=[common],
+                                          help="Ingest video files or directories once")
+    ingest_parser.add_argument("paths", nargs="+", help="Video files or directories")
+    ingest_parser.set_defaults(func=run_ingest)
+
+    watch_parser = subparsers.add_parser("watch", parents=[common],
+                                         help="Ingest new videos appearing in a directory")
+    watch_parser.add_argument("directory", help="Directory to watch (recursively)")
+    watch_parser.add_argument("--interval", type=float, default=10.0, help="Seconds between scans")
+    watch_parser.set_defaults(func=run_watch)
+
+    check_parser = subparsers.add_parser("check-db",
+                                         help="Check that hot queries use indexes")
+    check_parser.set_defaults(func=run_check_db)
+
+    coco_parser = subparsers.add_parser("export-coco",
+                                        help="Export the stored masks of a video as COCO")
+    coco_parser.add_argument("video_id", type=int, help="Database ID of the video")
+    coco_parser.add_argument("--output", default=None, help="Destination file")
+    coco_parser.add_argument("--include-empty", action="store_true",
+                             help="Keep annotations of empty masks")
+    coco_parser.set_defaults(func=run_export_coco)
+
+    yolo_parser = subparsers.add_parser("export-yolo",
+                                        help="Export the stored masks of a video as YOLO labels")
+    yolo_parser.add_argument("video_id", type=int, help="Database ID of the video")
+    yolo_parser.add_argument("--output", default=None, help="Destination directory")
+    yolo_parser.add_argument("--skip-empty", action="store_true",
+                             help="Do not write label files for frames without masks")
+    yolo_parser.set_defaults(func=run_export_yolo)
+
+    dataset_parser = subparsers.add_parser("build-dataset", parents=[common],
+                                           help="Build the train/val/test dataset of a project")
+    dataset_parser.add_argument("--force", action="store_true",
+                                help="Rebuild every video, not only changed ones")
+    dataset_parser.add_argument("--val", type=float, default=DEFAULT_VAL_FRACTION,
+                                help="Share of videos in the validation split")
+    dataset_parser.add_argument("--test", type=float, default=DEFAULT_TEST_FRACTION,
+                                help="Share of videos in the test split")
+    dataset_parser.add_argument("--seed", type=int, default=0, help="Seed of the split assignment")
+    dataset_parser.set_defaults(func=run_build_dataset)
+
+    render_parser = subparsers.add_parser("render-overlay",
+                                          help="Render the stored masks of a video into an overlay video")
+    render_parser.add_argument("video_id", type=int, help="Database ID of the video")
+    render_parser.add_argument("--model", default="sam2", help="Model name recorded for the render")
+    render_parser.add_argument("--alpha", type=float, default=DEFAULT_OVERLAY_ALPHA,
+                               help="Opacity of the object colors")
+    render_parser.set_defaults(func=run_render_overlay)
+
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    DatabaseAPI.initialize_database()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
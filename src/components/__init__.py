@@ -51,7 +51,9 @@ from .dropdown import (
 from .dropzone import (
     dropzone,
     video_dropzone,
-    image_dropzone
+    image_dropzone,
+    chunked_dropzone,
+    chunked_video_dropzone
 )
 
 # Navigation components
@@ -79,6 +81,7 @@ __all__ = [
 
     # Dropzone
     'dropzone', 'video_dropzone', 'image_dropzone',
+    'chunked_dropzone', 'chunked_video_dropzone',
 
     # Navigation
     'navbar', 'create_navbar',
@@ -1,5 +1,8 @@
 from dash import html, dcc
 
+# Size of the chunks streamed by assets/chunked_upload.js
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 def dropzone(id=None, accept="*", multiple=False, className="", children=None, **kwargs):
     """
@@ -114,3 +117,99 @@ def image_dropzone(id=None, className="", **kwargs):
         children=children,
         **kwargs
     )
+
+
+def chunked_dropzone(id, accept="*", chunk_size=DEFAULT_CHUNK_SIZE, className="", children=None, **kwargs):
+    """
+    Dropzone that streams a file to the server in resumable chunks
+
+    Unlike dcc.Upload, the file never passes through a callback as base64: the
+    browser sends raw chunks to /api/uploads (see assets/chunked_upload.js).
+    When the upload completes, the `data` of a dcc.Store with the given id is
+    set to {"upload_id", "filename", "size"}.
+
+    Args:
+        id: ID of the dcc.Store receiving the finished upload (string only)
+        accept: File types to accept (e.g., 'video/*', 'image/*', '.pdf')
+        chunk_size: Size in bytes of each uploaded chunk
+        className: Additional CSS classes
+        children: Custom children content for the dropzone
+        **kwargs: Additional props for the dropzone container
+    """
+
+    default_style = {
+        'width': '100%',
+        'height': '300px',
+        'borderWidth': '2px',
+        'borderStyle': 'dashed',
+        'borderRadius': '8px',
+        'borderColor': '#d1d5db',
+        'textAlign': 'center',
+        'backgroundColor': '#fafafa',
+        'cursor': 'pointer',
+        'transition': 'all 0.2s ease-in-out'
+    }
+
+    # Merge with any custom styles
+    style = {**default_style, **kwargs.pop('style', {})}
+
+    # Use custom children if provided, otherwise use default
+    if children is None:
+        children = html.Div([
+            html.I(className="fas fa-cloud-upload-alt text-4xl text-gray-400 mb-4"),
+            html.H3("Drag and drop a file here",
+                    className="text-lg font-medium text-gray-700 mb-2"),
+            html.P("or click to browse",
+                   className="text-sm text-gray-500 mb-2"),
+            html.P("Supports various file formats",
+                   className="text-xs text-gray-400")
+        ], className="flex flex-col items-center justify-center")
+
+    return html.Div([
+        dcc.Store(id=id),
+        html.Div([
+            children,
+            # Progress bar and status, updated by assets/chunked_upload.js
+            html.Div(
+                html.Div(className="chunked-dropzone-bar h-full bg-blue-500 rounded-full",
+                         style={'width': '0%'}),
+                className="hidden w-2/3 h-2 mt-4 bg-gray-200 rounded-full overflow-hidden"
+            ),
+            html.P(className="chunked-dropzone-status text-xs text-gray-500 mt-2")
+        ], className="flex flex-col items-center justify-center h-full")
+    ],
+        className=f"chunked-dropzone {className}".strip(),
+        style=style,
+        **{'data-store-id': id, 'data-accept': accept, 'data-chunk-size': str(chunk_size)},
+        **kwargs
+    )
+
+
+def chunked_video_dropzone(id, className="", **kwargs):
+    """
+    Specialized chunked dropzone for video files
+
+    Args:
+        id: ID of the dcc.Store receiving the finished upload
+        className: Additional CSS classes
+        **kwargs: Additional props for chunked_dropzone
+    """
+
+    # Override the children for video-specific messaging
+    children = html.Div([
+        html.I(className="fas fa-video text-4xl text-gray-400 mb-4"),
+        html.H3("Drag and drop a video file here",
+                className="text-lg font-medium text-gray-700 mb-2"),
+        html.P("or click to browse",
+               className="text-sm text-gray-500 mb-2"),
+        html.P("Supports MP4, AVI, MOV files of any size",
+               className="text-xs text-gray-400")
+    ], className="flex flex-col items-center justify-center")
+
+    return chunked_dropzone(
+        id=id,
+        accept='video/*',
+        className=className,
+        children=children,
+        **kwargs
+    )
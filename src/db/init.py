@@ -1,35 +1,24 @@
 import os
-from .session import db
-from .models import (
-    Project, VideoTypes, Videos, VideoInference,
-    Object, PointLabel, ObjectPoint
-)
+from .session import get_db_session
+from .models import VideoTypes, PointLabel
+from .migrations import migrate_database
 
 
 def initialize_database():
     """Initialize the database, create tables, and seed initial data"""
     try:
-        # Connect to the database
-        db.connect()
+        with get_db_session():
+            # Create missing tables and indexes, also on existing databases
+            migrate_database()
 
-        # Create all tables if they don't exist
-        db.create_tables([
-            Project, VideoTypes, Videos, VideoInference,
-            Object, PointLabel, ObjectPoint
-        ], safe=True)
-
-        # Seed initial data
-        seed_data()
+            # Seed initial data
+            seed_data()
 
         print(
             f"Database initialized successfully at: {os.path.abspath('easysam.db')}")
 
     except Exception as e:
         print(f"Error initializing database: {e}")
-    finally:
-        # Close the connection
-        if not db.is_closed():
-            db.close()
 
 
 def seed_data():
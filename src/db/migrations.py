@@ -0,0 +1,77 @@
+import logging
+from typing import Any, Dict, List
+
+from peewee import fn
+
+from .session import db, get_db_session
+from .models import (
+    Project, VideoTypes, Videos, VideoInference,
+    Frame, Object, PointLabel, ObjectPoint
+)
+
+logger = logging.getLogger(__name__)
+
+MODELS = [
+    Project, VideoTypes, Videos, VideoInference,
+    Frame, Object, PointLabel, ObjectPoint
+]
+
+# Single-column indexes of older databases that are prefixes of the composite
+# ObjectPoint indexes; they only slow down inserts
+OBSOLETE_INDEXES = ["objectpoint_object_id", "objectpoint_video_id"]
+
+# Single-table queries on hot paths, which must reach their rows through an index
+HOT_QUERIES = {
+    "get_object_points_by_frame_idx": lambda: ObjectPoint.select().where(
+        ObjectPoint.video == 1, ObjectPoint.frame_idx == 0),
+    "get_object_points_by_video": lambda: ObjectPoint.select().where(
+        ObjectPoint.video == 1),
+    "get_object_points_by_object": lambda: ObjectPoint.select().where(
+        ObjectPoint.object == 1),
+    "object_points_by_object_and_video": lambda: ObjectPoint.select().where(
+        ObjectPoint.object == 1, ObjectPoint.video == 1),
+    "get_videos_by_project": lambda: Videos.select().where(
+        Videos.project == 1,
+        ~fn.EXISTS(VideoInference.select().where(VideoInference.inference_video == Videos.id))),
+    "get_objects_by_project": lambda: Object.select().where(Object.project == 1),
+    "get_frame": lambda: Frame.select().where(Frame.video == 1, Frame.frame_idx == 0),
+}
+
+
+def migrate_database() -> None:
+    """Bring an existing database up to date with the models.
+
+    Creates missing tables and indexes and drops indexes made redundant by
+    composite ones. Every step is idempotent, so this is safe to run on each
+    start. Afterwards the query planner statistics are refreshed.
+    """
+    with get_db_session():
+        with db.atomic():
+            # create_tables(safe=True) also creates missing indexes with IF NOT EXISTS
+            db.create_tables(MODELS, safe=True)
+            for index_name in OBSOLETE_INDEXES:
+                db.execute_sql(f'DROP INDEX IF EXISTS "{index_name}"')
+        # Only analyzes tables whose statistics are missing or out of date
+        db.execute_sql("PRAGMA optimize")
+    logger.info("Database schema is up to date")
+
+
+def check_query_plans() -> List[Dict[str, Any]]:
+    """Run EXPLAIN QUERY PLAN on the hot queries and report whether each uses an index.
+
+    A plan step that scans the table means a migration is missing or a model
+    lost an index.
+
+    Returns:
+        List of dicts with name, plan (the plan steps) and ok
+    """
+    results = []
+    with get_db_session():
+        for name, make_query in HOT_QUERIES.items():
+            sql, params = make_query().sql()
+            rows = db.execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plan = [row[-1] for row in rows]
+            # SEARCH steps use an index; SCAN steps read the whole table (or index)
+            full_scan = any(step.startswith("SCAN") for step in plan)
+            results.append({"name": name, "plan": plan, "ok": not full_scan})
+    return results
@@ -45,6 +45,24 @@ class VideoInference(BaseModel):
         primary_key = CompositeKey('source_video', 'inference_video')
 
 
+class Frame(BaseModel):
+    id = AutoField(primary_key=True)
+    video = ForeignKeyField(Videos, backref='frames', on_delete='CASCADE')
+    frame_idx = IntegerField()  # index used by the inference session
+    source_frame_number = IntegerField()  # frame number in the source video
+    # In seconds, read from the stream; estimated as source_frame_number / fps,
+    # which assumes a constant frame rate, when the timestamps cannot be read
+    pts = FloatField()
+    path = CharField(max_length=500)
+    content_hash = CharField(max_length=64)
+
+    class Meta:
+        indexes = (
+            (('video', 'frame_idx'), True),
+            (('video', 'source_frame_number'), False),
+        )
+
+
 class Object(BaseModel):
     id = AutoField(primary_key=True)
     project = ForeignKeyField(Project, backref='objects', on_delete='CASCADE')
@@ -59,11 +77,18 @@ class PointLabel(BaseModel):
 
 class ObjectPoint(BaseModel):
     id = AutoField(primary_key=True)
-    object = ForeignKeyField(Object, backref='points', on_delete='CASCADE')
+    # Lookups by object or video use the composite indexes below
+    object = ForeignKeyField(Object, backref='points', on_delete='CASCADE', index=False)
     video = ForeignKeyField(
-        Videos, backref='object_points', on_delete='CASCADE')
+        Videos, backref='object_points', on_delete='CASCADE', index=False)
     point_label = ForeignKeyField(
         PointLabel, backref='object_points', on_delete='CASCADE')
     x = IntegerField()
     y = IntegerField()
     frame_idx = IntegerField()
+
+    class Meta:
+        indexes = (
+            (('video', 'frame_idx'), False),
+            (('object', 'video'), False),
+        )
@@ -1,8 +1,34 @@
+import threading
+
 from peewee import *
+from playhouse.pool import PooledSqliteDatabase
 
 # Define the database
 DATABASE_PATH = 'easysam.db'
-db = SqliteDatabase(DATABASE_PATH)
+
+# Applied to every new connection. WAL lets readers run alongside a writer and,
+# with synchronous=NORMAL, commits no longer fsync (only checkpoints do)
+DATABASE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'cache_size': -64 * 1024,  # negative values are KiB: 64 MiB page cache
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# Connections are pooled and reused across calls and threads instead of being
+# opened and closed for every query. Dash callbacks, ingest workers and the
+# upload routes each check one out per session.
+db = PooledSqliteDatabase(
+    DATABASE_PATH,
+    pragmas=DATABASE_PRAGMAS,
+    max_connections=32,
+    stale_timeout=600,
+    timeout=10,  # seconds to wait for a free connection when all are in use
+    check_same_thread=False,
+)
+
+# Per-thread nesting depth of get_db_session, so nested sessions share a connection
+_session_state = threading.local()
 
 
 class BaseModel(Model):
@@ -19,22 +45,31 @@ def get_db():
 
 
 def get_db_session():
-    """Context manager for database sessions. Automatically handles connection lifecycle."""
+    """Context manager for database sessions. Automatically handles connection lifecycle.
+
+    The thread checks a connection out of the pool on entering the outermost
+    session and returns it on leaving, so sessions can be nested (for example a
+    DatabaseAPI call inside another one's transaction).
+    """
     class DatabaseSession:
         def __enter__(self):
-            if db.is_closed():
-                db.connect()
+            depth = getattr(_session_state, 'depth', 0)
+            if depth == 0:
+                db.connect(reuse_if_open=True)
+            _session_state.depth = depth + 1
             return db
 
         def __exit__(self, exc_type, exc_val, exc_tb):
-            if not db.is_closed():
+            _session_state.depth -= 1
+            if _session_state.depth == 0 and not db.is_closed():
+                # Returns the connection to the pool rather than closing it
                 db.close()
 
     return DatabaseSession()
 
 
 def close_db():
-    """Close the database connection if it's open."""
+    """Close this thread's connection and all idle pooled connections."""
     if not db.is_closed():
         db.close()
-        db.close()
+    db.close_idle()
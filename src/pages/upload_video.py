@@ -1,16 +1,14 @@
 import dash
 from dash import html, dcc, callback, Input, Output, State
 from typing import NamedTuple, Optional
-from pathlib import Path
-import base64
-from utils.frames import extract_frames
-from utils.paths import get_original_frames_path, UPLOADS_DIR
+from api.ingest import ingest_pipeline
+from api.uploads import discard_upload
 from components import (
     text_card,
     primary_button, secondary_button,
     text_input, number_input,
     select, create_options,
-    video_dropzone
+    chunked_video_dropzone
 )
 from layout import page_layout, section, content_grid, flex_container
 
@@ -62,13 +60,14 @@ resolution_options = create_options({
 })
 
 layout = page_layout([
-    # Hidden location component for redirects
-    dcc.Location(id="page-redirect", refresh=True),
+    # Ingest jobs started from this browser session, polled while running
+    dcc.Store(id="ingest-jobs", storage_type="session", data=[]),
+    dcc.Interval(id="ingest-poll", interval=1000, disabled=True),
     section([
         html.Div([
             # Upload Zone
             html.Div([
-                video_dropzone(id='video-upload')
+                chunked_video_dropzone(id='video-upload')
             ], id="upload-zone", className="mb-6"),
 
             # Upload Status
@@ -124,7 +123,11 @@ layout = page_layout([
                 )
             ], id="video-form", style={"display": "none"})
         ])
-    ], title="Upload Video")
+    ], title="Upload Video"),
+
+    section([
+        html.Div(id="ingest-jobs-panel")
+    ], title="Processing")
 ], title="Video Upload")
 
 
@@ -132,13 +135,14 @@ layout = page_layout([
     [Output('upload-status', 'children'),
      Output('video-form', 'style'),
      Output('video-name-input', 'value')],
-    [Input('video-upload', 'contents')],
-    [State('video-upload', 'filename')]
+    [Input('video-upload', 'data')]
 )
-def handle_video_upload(contents, filename):
-    if contents is None:
+def handle_video_upload(upload):
+    if upload is None:
         return "", {"display": "none"}, ""
 
+    filename = upload.get('filename')
+
     # Show upload success message
     status_message = html.Div([
         html.Div([
@@ -210,13 +214,18 @@ def validate_form_inputs(video_name, resolution, frame_step):
      Output('frame-step-input', 'value', allow_duplicate=True),
      Output('resolution-select', 'value', allow_duplicate=True)],
     [Input('cancel-btn', 'n_clicks')],
+    [State('video-upload', 'data')],
     prevent_initial_call=True
 )
-def handle_cancel(n_clicks):
+def handle_cancel(n_clicks, upload):
     if n_clicks:
+        # Drop the uploaded file, it will not be processed
+        if upload:
+            discard_upload(upload['upload_id'])
+
         # Re-mount the dropzone and reset all UI to initial state without touching styles
         return (
-            [video_dropzone(id='video-upload')],  # reset upload zone
+            [chunked_video_dropzone(id='video-upload')],  # reset upload zone
             "",                                 # clear upload status
             {"display": "none"},               # hide form
             True,                                 # disable process button
@@ -239,21 +248,21 @@ def handle_cancel(n_clicks):
 
 
 @callback(
-    [
-        Output('upload-status', 'children', allow_duplicate=True),
-        Output('page-redirect', 'href')
-    ],
+    [Output('upload-status', 'children', allow_duplicate=True),
+     Output('upload-zone', 'children', allow_duplicate=True),
+     Output('video-form', 'style', allow_duplicate=True),
+     Output('ingest-jobs', 'data')],
     [Input('process-btn', 'n_clicks')],
     [State('video-name-input', 'value'),
      State('resolution-select', 'value'),
      State('frame-step-input', 'value'),
-     State('video-upload', 'contents'),
-     State('video-upload', 'filename')],
+     State('video-upload', 'data'),
+     State('ingest-jobs', 'data')],
     prevent_initial_call=True
 )
-def handle_process_video(n_clicks, video_name, resolution, frame_step, upload_contents, upload_filename):
+def handle_process_video(n_clicks, video_name, resolution, frame_step, upload, job_ids):
     if not n_clicks:
-        return dash.no_update, dash.no_update
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
 
     # Create and validate form data
     form_data = VideoFormData(
@@ -278,10 +287,10 @@ def handle_process_video(n_clicks, video_name, resolution, frame_step, upload_co
                 ])
             ], className="flex items-center")
         ], className="bg-red-50 border border-red-200 rounded-lg p-4")
-        return error_message, dash.no_update
+        return error_message, dash.no_update, dash.no_update, dash.no_update
 
     # Ensure a video is uploaded
-    if not upload_contents or not upload_filename:
+    if not upload:
         error_message = html.Div([
             html.Div([
                 html.I(
@@ -294,63 +303,107 @@ def handle_process_video(n_clicks, video_name, resolution, frame_step, upload_co
                 ])
             ], className="flex items-center")
         ], className="bg-red-50 border border-red-200 rounded-lg p-4")
-        return error_message, dash.no_update
-
-    # Decode and persist the uploaded video to disk
-    try:
-        header, b64data = upload_contents.split(',', 1)
-        video_bytes = base64.b64decode(b64data)
-        ext = Path(upload_filename).suffix or ".mp4"
-        video_dir = Path(UPLOADS_DIR) / video_name
-        video_dir.mkdir(parents=True, exist_ok=True)
-        video_path = video_dir / f"{video_name}{ext}"
-        with open(video_path, 'wb') as f:
-            f.write(video_bytes)
-    except Exception as e:
-        error_message = html.Div([
-            html.Div([
-                html.I(
-                    className="fas fa-exclamation-triangle text-red-500 text-xl mr-3"),
-                html.Div([
-                    html.H4("Failed to save upload",
-                            className="text-sm font-medium text-gray-900"),
-                    html.P(str(e), className="text-xs text-gray-600")
-                ])
-            ], className="flex items-center")
-        ], className="bg-red-50 border border-red-200 rounded-lg p-4")
-        return error_message, dash.no_update
-
-    # Run frame extraction to the original frames path
-    try:
-        output_dir = get_original_frames_path(video_name)
-        extract_frames(video_path=video_path,
-                       output_dir=output_dir, frame_step=frame_step)
-    except Exception as e:
-        error_message = html.Div([
-            html.Div([
-                html.I(
-                    className="fas fa-exclamation-triangle text-red-500 text-xl mr-3"),
-                html.Div([
-                    html.H4("Frame extraction failed",
-                            className="text-sm font-medium text-gray-900"),
-                    html.P(str(e), className="text-xs text-gray-600")
-                ])
-            ], className="flex items-center")
-        ], className="bg-red-50 border border-red-200 rounded-lg p-4")
-        return error_message, dash.no_update
+        return error_message, dash.no_update, dash.no_update, dash.no_update
+
+    # Save, probe, extract and register the video in the background
+    job_id = ingest_pipeline.submit(
+        upload_id=upload['upload_id'],
+        video_name=video_name.strip(),
+        frame_step=frame_step
+    )
 
-    # Success: optional message and redirect
-    success_message = html.Div([
+    status_message = html.Div([
         html.Div([
-            html.I(className="fas fa-check-circle text-green-500 text-xl mr-3"),
+            html.I(className="fas fa-cog text-blue-500 text-xl mr-3"),
             html.Div([
-                html.H4("Video processed",
+                html.H4(f"Processing {video_name}",
                         className="text-sm font-medium text-gray-900"),
-                html.P("Redirecting to home...",
+                html.P("You can upload another video while this one is processed",
                        className="text-xs text-gray-600")
             ])
         ], className="flex items-center")
-    ], className="bg-green-50 border border-green-200 rounded-lg p-4")
+    ], className="bg-blue-50 border border-blue-200 rounded-lg p-4")
+
+    # Reset the upload zone and form for the next video
+    return (
+        status_message,
+        [chunked_video_dropzone(id='video-upload')],
+        {"display": "none"},
+        (job_ids or []) + [job_id],
+    )
 
-    # Redirect to index page
-    return success_message, "/"
+
+@callback(
+    [Output('ingest-jobs-panel', 'children'),
+     Output('ingest-poll', 'disabled')],
+    [Input('ingest-poll', 'n_intervals'),
+     Input('ingest-jobs', 'data')]
+)
+def update_ingest_progress(n_intervals, job_ids):
+    """Render the progress of this session's ingest jobs, polling while any is running"""
+    jobs = ingest_pipeline.get_jobs(job_ids or [])
+    if not jobs:
+        return "", True
+
+    is_running = any(job['status'] in ('queued', 'running') for job in jobs)
+    return [render_ingest_job(job) for job in reversed(jobs)], not is_running
+
+
+# Labels of the ingest pipeline stages
+STAGE_LABELS = {
+    "save": "Save upload",
+    "probe": "Read video metadata",
+    "register": "Register video",
+    "extract": "Extract frames",
+    "index": "Index frames",
+    "prewarm": "Prewarm frame cache",
+}
+
+# Progress bar colors by stage status
+STAGE_COLORS = {
+    "pending": "bg-gray-300",
+    "running": "bg-blue-500",
+    "done": "bg-green-500",
+    "skipped": "bg-gray-300",
+    "failed": "bg-red-500",
+}
+
+
+def render_ingest_job(job):
+    """
+    Render an ingest job with one progress bar per stage
+
+    Args:
+        job: Ingest job state as returned by the ingest pipeline
+    """
+    status_icons = {
+        "queued": "fas fa-clock text-gray-400",
+        "running": "fas fa-spinner fa-spin text-blue-500",
+        "done": "fas fa-check-circle text-green-500",
+        "failed": "fas fa-exclamation-triangle text-red-500",
+    }
+
+    stage_rows = []
+    for stage, label in STAGE_LABELS.items():
+        stage_state = job['stages'][stage]
+        progress = stage_state['progress']
+        if stage_state['status'] == 'done':
+            progress = 1.0
+        stage_rows.append(html.Div([
+            html.Span(label, className="text-xs text-gray-600 w-40"),
+            html.Div(
+                html.Div(className=f"h-full rounded-full {STAGE_COLORS[stage_state['status']]}",
+                         style={"width": f"{100 * (progress or 0):.0f}%"}),
+                className="flex-1 h-2 bg-gray-100 rounded-full overflow-hidden"
+            ),
+            html.Span(stage_state['status'], className="text-xs text-gray-500 w-16 text-right")
+        ], className="flex items-center gap-3 mb-1"))
+
+    return html.Div([
+        html.Div([
+            html.I(className=f"{status_icons[job['status']]} mr-2"),
+            html.H4(job['video_name'], className="text-sm font-medium text-gray-900")
+        ], className="flex items-center mb-3"),
+        html.Div(stage_rows),
+        html.P(job['error'], className="text-xs text-red-600 mt-2") if job['error'] else None
+    ], className="bg-white border border-gray-200 rounded-lg p-4 mb-3")
@@ -1,20 +1,77 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
 import subprocess
+import threading
+from fractions import Fraction
 from pathlib import Path
-from typing import List, Union
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
 
+from .probe import probe_frame_times, probe_video
 
-def extract_frames(video_path: Union[str, Path], output_dir: Union[str, Path], frame_step: int) -> List[Path]:
+logger = logging.getLogger(__name__)
+
+# Per-video extraction manifest, stored next to the extracted frames
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 3
+
+# Frames are kept here by original frame index so that re-extractions with a
+# different frame_step can link them instead of decoding the video again
+SOURCE_FRAMES_DIRNAME = ".source_frames"
+
+# Above this share of missing frames a full decode is cheaper than one seek per frame
+SEEK_DECODE_MAX_FRACTION = 0.25
+
+# Thumbnail and preview proxy defaults
+THUMBNAIL_WIDTH = 320
+PROXY_HEIGHT = 360
+PROXY_CRF = 32
+
+
+class ExtractionProgress(NamedTuple):
+    """Progress of a running extraction"""
+    frames: int  # frames written to the output directory so far, in order
+    out_time: float  # seconds of source video processed
+
+
+ProgressCallback = Callable[[ExtractionProgress], None]
+
+
+def extract_frames(
+    video_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    frame_step: int,
+    thumbnail_dir: Optional[Union[str, Path]] = None,
+    proxy_path: Optional[Union[str, Path]] = None,
+    thumbnail_width: int = THUMBNAIL_WIDTH,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> List[Path]:
     """
     Extract PNG frames from a video using ffmpeg with CUDA hardware acceleration.
 
     - Frames are saved with 6-digit padding using the original video file name:
       e.g., "<video-stem>_000001.png"
     - frame_step keeps 1 frame every N frames (1=every frame, 2=every other frame, etc.).
+    - Every extracted frame is also kept by its original frame index, and a
+      manifest records which indices are on disk. Re-extracting at another
+      frame_step links the frames that already exist and only decodes the
+      missing indices with targeted seeks (or one full pass if most are missing).
+    - Optionally, the same decode also writes a JPEG thumbnail per extracted
+      frame ("<video-stem>_000001.jpg" in `thumbnail_dir`) and a low-bitrate
+      proxy video of every frame for scrubbing, through one ffmpeg split graph.
 
     Args:
         video_path: Path to the input video file.
         output_dir: Directory where extracted frames will be saved (created if missing).
         frame_step: Keep one frame every `frame_step` frames. Must be >= 1.
+        thumbnail_dir: Directory for per-frame thumbnails, or None to skip them.
+        proxy_path: Output file for the preview proxy video, or None to skip it.
+        thumbnail_width: Width in pixels of the thumbnails.
+        progress_callback: Called with an ExtractionProgress as ffmpeg reports it.
+            Output frames are written in order, so the first `frames - 1`
+            of them are complete whenever it is called.
 
     Returns:
         A sorted list of Paths to the extracted frames.
@@ -29,14 +86,259 @@ def extract_frames(video_path: Union[str, Path], output_dir: Union[str, Path], f
     video_path = Path(video_path)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    if thumbnail_dir is not None:
+        thumbnail_dir = Path(thumbnail_dir)
+        thumbnail_dir.mkdir(parents=True, exist_ok=True)
+    if proxy_path is not None:
+        proxy_path = Path(proxy_path)
+        proxy_path.parent.mkdir(parents=True, exist_ok=True)
 
     base_name = video_path.stem
-    output_pattern = output_dir / f"{base_name}_%06d.png"
+    manifest = _load_manifest(output_dir, video_path)
 
-    # Use select filter to keep one frame every `frame_step` frames.
-    # Escape comma in the expression for ffmpeg filter syntax.
-    filter_expr = f"select=not(mod(n\\,{frame_step}))"
+    if thumbnail_dir is not None and manifest["thumbnail_width"] != thumbnail_width:
+        # Thumbnails of another size cannot be reused
+        shutil.rmtree(thumbnail_dir / SOURCE_FRAMES_DIRNAME, ignore_errors=True)
+        manifest["thumbnails"] = []
+        manifest["thumbnail_width"] = thumbnail_width
+
+    needs_proxy = proxy_path is not None and (
+        manifest["proxy"] != str(proxy_path) or not proxy_path.exists()
+    )
+
+    if manifest["max_frame"] is None or needs_proxy:
+        # Nothing is known about this video yet, or the proxy needs every frame anyway
+        _decode_all(video_path, output_dir, frame_step, manifest,
+                    thumbnail_dir, proxy_path, thumbnail_width, progress_callback)
+    else:
+        cached = set(manifest["frames"])
+        if thumbnail_dir is not None:
+            cached &= set(manifest["thumbnails"])
+        wanted = range(0, manifest["max_frame"] + 1, frame_step)
+        missing = [idx for idx in wanted if idx not in cached]
+        if len(missing) > SEEK_DECODE_MAX_FRACTION * len(wanted):
+            _decode_all(video_path, output_dir, frame_step, manifest,
+                        thumbnail_dir, None, thumbnail_width, progress_callback)
+        else:
+            if missing:
+                _decode_by_seeking(video_path, output_dir, missing, manifest,
+                                   thumbnail_dir, thumbnail_width)
+            _link_frames(output_dir, base_name, frame_step, manifest["frames"],
+                         manifest["max_frame"], ".png")
+            if thumbnail_dir is not None:
+                _link_frames(thumbnail_dir, base_name, frame_step, manifest["thumbnails"],
+                             manifest["max_frame"], ".jpg")
+
+    manifest["frame_step"] = frame_step
+    _save_manifest(output_dir, manifest)
+
+    # Collect and return extracted frame paths
+    return sorted(output_dir.glob(f"{base_name}_*.png"))
+
+
+def frame_records(
+    video_path: Union[str, Path],
+    output_dir: Union[str, Path],
+    frame_rate: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Describe the frames currently extracted by `extract_frames`, ready for a bulk insert.
+
+    The pts of each frame is read from the stream once (see probe_frame_times)
+    and kept in the manifest. When the stream's timestamps cannot be read, it
+    is estimated as source_frame_number / frame_rate, which is only exact for
+    constant frame rate videos starting at 0.
+
+    Args:
+        video_path: Path to the input video file.
+        output_dir: Directory the frames were extracted to.
+        frame_rate: Frame rate of the video for the pts estimate, probed with
+            ffprobe when omitted and needed.
+
+    Returns:
+        One dict per extracted frame, in frame_idx order, with keys frame_idx,
+        source_frame_number, pts (seconds), path and content_hash.
+
+    Raises:
+        RuntimeError: If no extraction manifest exists for the video.
+    """
+    video_path = Path(video_path)
+    output_dir = Path(output_dir)
+    try:
+        with open(output_dir / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuntimeError(f"No extracted frames found in {output_dir}") from e
+
+    frame_times = manifest.get("pts")
+    if frame_times is None:
+        try:
+            frame_times = probe_frame_times(video_path)
+        except (FileNotFoundError, RuntimeError) as e:
+            logger.warning(f"Cannot read the frame timestamps of {video_path}, estimating them: {e}")
+            frame_times = []
+        manifest["pts"] = frame_times
+
+    base_name = video_path.stem
+    frame_step = manifest["frame_step"]
+    source_dir = output_dir / SOURCE_FRAMES_DIRNAME
+    hashes = manifest.setdefault("hashes", {})
+    wanted = [idx for idx in manifest["frames"]
+              if idx % frame_step == 0 and idx <= manifest["max_frame"]]
+
+    if wanted and wanted[-1] >= len(frame_times) and frame_rate is None:
+        frame_rate = float(_probe_frame_rate(video_path))
+
+    records = []
+    for frame_idx, source_idx in enumerate(wanted):
+        key = str(source_idx)
+        if key not in hashes:
+            hashes[key] = _hash_file(_source_frame_path(source_dir, source_idx, ".png"))
+        records.append({
+            "frame_idx": frame_idx,
+            "source_frame_number": source_idx,
+            "pts": (frame_times[source_idx] if source_idx < len(frame_times)
+                    else source_idx / frame_rate),
+            "path": str(output_dir / f"{base_name}_{frame_idx + 1:06d}.png"),
+            "content_hash": hashes[key],
+        })
+
+    # Hashes and timestamps are cached, so later calls only hash new frames
+    _save_manifest(output_dir, manifest)
+    return records
+
+
+class ExtractionJob:
+    """Runs extract_frames in a background thread so frames can be used while it runs."""
+
+    def __init__(self, video_path: Union[str, Path], output_dir: Union[str, Path], frame_step: int,
+                 duration: Optional[float] = None, **extract_kwargs: Any) -> None:
+        """Create an extraction job; call start() to run it.
+
+        Args:
+            video_path: Path to the input video file.
+            output_dir: Directory where extracted frames will be saved.
+            frame_step: Keep one frame every `frame_step` frames.
+            duration: Duration of the video in seconds, used to report a progress fraction.
+            **extract_kwargs: Extra keyword arguments for extract_frames.
+        """
+        self.video_path = Path(video_path)
+        self.output_dir = Path(output_dir)
+        self.frame_step = frame_step
+        self.duration = duration
+        self.progress = ExtractionProgress(frames=0, out_time=0.0)
+        self.frames: Optional[List[Path]] = None
+        self.error: Optional[BaseException] = None
+
+        self._extract_kwargs = extract_kwargs
+        self._done = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name=f"extract-{self.video_path.stem}", daemon=True)
+
+    def start(self) -> "ExtractionJob":
+        self._thread.start()
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of the video processed so far, or None if the duration is unknown"""
+        if self._done:
+            return 1.0
+        if not self.duration:
+            return None
+        return min(self.progress.out_time / self.duration, 1.0)
+
+    def frames_available(self) -> int:
+        """Number of leading frames that are completely written to disk"""
+        with self._condition:
+            if self._done:
+                return len(self.frames or [])
+            # The most recently reported frame may still be being written
+            return max(self.progress.frames - 1, 0)
+
+    def wait_for_frame(self, frame_idx: int, timeout: Optional[float] = None) -> Optional[Path]:
+        """Block until the frame at `frame_idx` (0-based) is on disk.
+
+        Returns:
+            The frame path, or None if the video has fewer frames
+
+        Raises:
+            TimeoutError: If the frame is not available within `timeout` seconds
+            RuntimeError: If the extraction failed
+        """
+        with self._condition:
+            available = self._condition.wait_for(
+                lambda: self._done or frame_idx < self.progress.frames - 1, timeout)
+            if not available:
+                raise TimeoutError(
+                    f"Frame {frame_idx} of {self.video_path.name} not extracted after {timeout}s")
+            if not self._done:
+                return self.output_dir / f"{self.video_path.stem}_{frame_idx + 1:06d}.png"
+
+        frames = self.wait()
+        return frames[frame_idx] if frame_idx < len(frames) else None
+
+    def wait(self, timeout: Optional[float] = None) -> List[Path]:
+        """Wait for the extraction to finish and return the extracted frames."""
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError(f"Extraction of {self.video_path.name} still running")
+        if self.error is not None:
+            raise RuntimeError(f"Frame extraction failed: {self.error}") from self.error
+        return self.frames
+
+    def _on_progress(self, progress: ExtractionProgress) -> None:
+        with self._condition:
+            self.progress = progress
+            self._condition.notify_all()
+
+    def _run(self) -> None:
+        frames, error = None, None
+        try:
+            frames = extract_frames(self.video_path, self.output_dir, self.frame_step,
+                                    progress_callback=self._on_progress, **self._extract_kwargs)
+        except Exception as e:
+            logger.error(f"Frame extraction of {self.video_path} failed: {e}")
+            error = e
+
+        with self._condition:
+            self.frames = frames
+            self.error = error
+            self._done = True
+            self._condition.notify_all()
+
+
+# Running and finished extraction jobs by output directory
+_jobs: Dict[Path, ExtractionJob] = {}
+_jobs_lock = threading.Lock()
+
+
+def start_extraction(video_path: Union[str, Path], output_dir: Union[str, Path], frame_step: int,
+                     duration: Optional[float] = None, **extract_kwargs: Any) -> ExtractionJob:
+    """Start extracting frames in the background, reusing a job already running for `output_dir`."""
+    key = Path(output_dir).resolve()
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None and not job.done:
+            return job
+        job = ExtractionJob(video_path, output_dir, frame_step,
+                            duration=duration, **extract_kwargs)
+        _jobs[key] = job
+    return job.start()
 
+
+def get_extraction_job(output_dir: Union[str, Path]) -> Optional[ExtractionJob]:
+    """Get the most recent extraction job writing to `output_dir`, if any."""
+    with _jobs_lock:
+        return _jobs.get(Path(output_dir).resolve())
+
+
+def _run_ffmpeg(args: List[str], progress_callback: Optional[ProgressCallback] = None) -> None:
     cmd = [
         "ffmpeg",
         "-hide_banner",
@@ -46,19 +348,19 @@ def extract_frames(video_path: Union[str, Path], output_dir: Union[str, Path], f
         "-y",
         "-hwaccel",
         "cuda",
-        "-i",
-        str(video_path),
-        "-vf",
-        filter_expr,
-        "-vsync",
-        "vfr",
-        "-start_number",
-        "1",
-        str(output_pattern),
     ]
+    if progress_callback is not None:
+        # Machine-readable key=value progress blocks on stdout
+        cmd += ["-progress", "pipe:1", "-nostats"]
+    cmd += args
 
     try:
-        subprocess.run(cmd, check=True)
+        if progress_callback is None:
+            subprocess.run(cmd, check=True)
+            return
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) as proc:
+            _read_progress(proc.stdout, progress_callback)
+            returncode = proc.wait()
     except FileNotFoundError as e:
         raise RuntimeError(
             "ffmpeg not found. Ensure ffmpeg is installed and in PATH.") from e
@@ -66,5 +368,283 @@ def extract_frames(video_path: Union[str, Path], output_dir: Union[str, Path], f
         raise RuntimeError(
             f"ffmpeg failed with exit code {e.returncode}") from e
 
-    # Collect and return extracted frame paths
-    return sorted(output_dir.glob(f"{base_name}_*.png"))
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed with exit code {returncode}")
+
+
+def _read_progress(stream, progress_callback: ProgressCallback) -> None:
+    """Parse ffmpeg -progress output, reporting each completed block."""
+    values: Dict[str, str] = {}
+    for line in stream:
+        key, _, value = line.strip().partition("=")
+        values[key] = value
+        if key != "progress":
+            continue
+        try:
+            frames = int(values.get("frame", 0))
+        except ValueError:
+            frames = 0
+        try:
+            out_time = int(values.get("out_time_us", 0)) / 1_000_000
+        except ValueError:
+            out_time = 0.0
+        progress_callback(ExtractionProgress(frames=frames, out_time=max(out_time, 0.0)))
+
+
+def _decode_all(
+    video_path: Path,
+    output_dir: Path,
+    frame_step: int,
+    manifest: Dict[str, Any],
+    thumbnail_dir: Optional[Path],
+    proxy_path: Optional[Path],
+    thumbnail_width: int,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> None:
+    """Decode the video once, splitting it into frames, thumbnails and proxy outputs."""
+    base_name = video_path.stem
+    _remove_output_frames(output_dir, base_name, ".png")
+    if thumbnail_dir is not None:
+        _remove_output_frames(thumbnail_dir, base_name, ".jpg")
+
+    # Use select filter to keep one frame every `frame_step` frames.
+    # Escape comma in the expression for ffmpeg filter syntax.
+    select_expr = f"select=not(mod(n\\,{frame_step}))"
+
+    branches = [("frames", select_expr)]
+    if thumbnail_dir is not None:
+        branches.append(("thumbs", f"{select_expr},scale={thumbnail_width}:-2"))
+    if proxy_path is not None:
+        branches.append(("proxy", f"scale=-2:min({PROXY_HEIGHT}\\,ih)"))
+
+    # A single decode feeds every output through the split filter
+    split_labels = "".join(f"[{name}_in]" for name, _ in branches)
+    filter_graph = ";".join(
+        [f"[0:v]split={len(branches)}{split_labels}"]
+        + [f"[{name}_in]{chain}[{name}]" for name, chain in branches]
+    )
+
+    args = [
+        "-i",
+        str(video_path),
+        "-filter_complex",
+        filter_graph,
+        "-map",
+        "[frames]",
+        "-fps_mode",
+        "vfr",
+        "-start_number",
+        "1",
+        str(output_dir / f"{base_name}_%06d.png"),
+    ]
+    if thumbnail_dir is not None:
+        args += [
+            "-map",
+            "[thumbs]",
+            "-fps_mode",
+            "vfr",
+            "-q:v",
+            "5",
+            "-start_number",
+            "1",
+            str(thumbnail_dir / f"{base_name}_%06d.jpg"),
+        ]
+    if proxy_path is not None:
+        args += [
+            "-map",
+            "[proxy]",
+            "-an",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "veryfast",
+            "-crf",
+            str(PROXY_CRF),
+            "-pix_fmt",
+            "yuv420p",
+            # Short GOPs keep seeking responsive while scrubbing
+            "-g",
+            "15",
+            "-movflags",
+            "+faststart",
+            str(proxy_path),
+        ]
+    _run_ffmpeg(args, progress_callback)
+
+    outputs = sorted(output_dir.glob(f"{base_name}_*.png"))
+    for position in range(len(outputs)):
+        manifest["hashes"].pop(str(position * frame_step), None)
+    manifest["frames"] = _index_outputs(output_dir, outputs, frame_step, manifest["frames"])
+    if thumbnail_dir is not None:
+        thumbs = sorted(thumbnail_dir.glob(f"{base_name}_*.jpg"))
+        manifest["thumbnails"] = _index_outputs(
+            thumbnail_dir, thumbs, frame_step, manifest["thumbnails"])
+    if proxy_path is not None:
+        manifest["proxy"] = str(proxy_path)
+
+    if frame_step not in manifest["complete_steps"]:
+        manifest["complete_steps"].append(frame_step)
+    if outputs:
+        # The video ends somewhere before the next frame this step would have kept
+        last_possible = (len(outputs) - 1) * frame_step + frame_step - 1
+        if manifest["max_frame"] is None or last_possible < manifest["max_frame"]:
+            manifest["max_frame"] = last_possible
+    else:
+        manifest["max_frame"] = -1
+
+
+def _decode_by_seeking(
+    video_path: Path,
+    output_dir: Path,
+    indices: List[int],
+    manifest: Dict[str, Any],
+    thumbnail_dir: Optional[Path],
+    thumbnail_width: int,
+) -> None:
+    """Decode individual source frames (and their thumbnails) with one accurate seek each."""
+    source_dir = output_dir / SOURCE_FRAMES_DIRNAME
+    source_dir.mkdir(exist_ok=True)
+    thumb_source_dir = None
+    if thumbnail_dir is not None:
+        thumb_source_dir = thumbnail_dir / SOURCE_FRAMES_DIRNAME
+        thumb_source_dir.mkdir(exist_ok=True)
+
+    frame_rate = _probe_frame_rate(video_path)
+    frames = set(manifest["frames"])
+    thumbs = set(manifest["thumbnails"])
+
+    for source_idx in indices:
+        # Write under temporary names so existing links to the old files stay intact
+        target = _source_frame_path(source_dir, source_idx, ".png")
+        tmp_target = target.with_suffix(".tmp.png")
+        # Seek half a frame early so rounding never skips past the wanted frame
+        timestamp = float(max(source_idx - Fraction(1, 2), 0) / frame_rate)
+        args = ["-ss", f"{timestamp:.6f}", "-i", str(video_path)]
+        if thumb_source_dir is None:
+            args += ["-frames:v", "1", str(tmp_target)]
+        else:
+            thumb_target = _source_frame_path(thumb_source_dir, source_idx, ".jpg")
+            tmp_thumb_target = thumb_target.with_suffix(".tmp.jpg")
+            args += [
+                "-filter_complex",
+                f"[0:v]split=2[frame][thumb_in];[thumb_in]scale={thumbnail_width}:-2[thumb]",
+                "-map", "[frame]", "-frames:v", "1", str(tmp_target),
+                "-map", "[thumb]", "-frames:v", "1", "-q:v", "5", str(tmp_thumb_target),
+            ]
+        _run_ffmpeg(args)
+
+        if not tmp_target.exists():
+            # Seeking past the last frame yields nothing: the video is shorter than assumed
+            manifest["max_frame"] = min(manifest["max_frame"], source_idx - 1)
+            break
+        os.replace(tmp_target, target)
+        frames.add(source_idx)
+        manifest["hashes"].pop(str(source_idx), None)
+        if thumb_source_dir is not None:
+            os.replace(tmp_thumb_target, thumb_target)
+            thumbs.add(source_idx)
+
+    manifest["frames"] = sorted(frames)
+    manifest["thumbnails"] = sorted(thumbs)
+
+
+def _index_outputs(directory: Path, outputs: List[Path], frame_step: int, known: List[int]) -> List[int]:
+    """Link freshly decoded outputs into the source frame cache and return the cached indices."""
+    source_dir = directory / SOURCE_FRAMES_DIRNAME
+    source_dir.mkdir(exist_ok=True)
+    indices = set(known)
+    for position, output_path in enumerate(outputs):
+        source_idx = position * frame_step
+        _link_or_copy(output_path, _source_frame_path(
+            source_dir, source_idx, output_path.suffix))
+        indices.add(source_idx)
+    return sorted(indices)
+
+
+def _link_frames(directory: Path, base_name: str, frame_step: int, cached: List[int],
+                 max_frame: int, suffix: str) -> None:
+    """Expose the cached source frames of `frame_step` as sequentially numbered outputs."""
+    _remove_output_frames(directory, base_name, suffix)
+    source_dir = directory / SOURCE_FRAMES_DIRNAME
+
+    wanted = [idx for idx in cached if idx % frame_step == 0 and idx <= max_frame]
+    for position, source_idx in enumerate(wanted, start=1):
+        _link_or_copy(_source_frame_path(source_dir, source_idx, suffix),
+                      directory / f"{base_name}_{position:06d}{suffix}")
+
+
+def _probe_frame_rate(video_path: Path) -> Fraction:
+    frame_rate = Fraction(probe_video(video_path).frame_rate)
+    if frame_rate <= 0:
+        raise RuntimeError(f"Could not determine the frame rate of {video_path}")
+    return frame_rate
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_frame_path(source_dir: Path, source_idx: int, suffix: str) -> Path:
+    return source_dir / f"{source_idx:08d}{suffix}"
+
+
+def _remove_output_frames(directory: Path, base_name: str, suffix: str) -> None:
+    for frame_path in directory.glob(f"{base_name}_*{suffix}"):
+        frame_path.unlink()
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard link `src` to `dst`, copying when the filesystem does not support links."""
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _video_signature(video_path: Path) -> Dict[str, int]:
+    stat = video_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _load_manifest(output_dir: Path, video_path: Path) -> Dict[str, Any]:
+    """Load the extraction manifest, starting over if it belongs to another version of the video."""
+    signature = _video_signature(video_path)
+    try:
+        with open(output_dir / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and manifest.get("video") == signature:
+            return manifest
+    except (OSError, ValueError):
+        pass
+
+    # Frames cached for a different file are stale
+    shutil.rmtree(output_dir / SOURCE_FRAMES_DIRNAME, ignore_errors=True)
+    return {
+        "version": MANIFEST_VERSION,
+        "video": signature,
+        "frame_step": None,
+        "complete_steps": [],
+        # Highest source frame index the video can have, None until first decoded
+        "max_frame": None,
+        "frames": [],
+        # Content hash of each cached source frame, keyed by index
+        "hashes": {},
+        # Presentation timestamp of every source frame, None until first read
+        "pts": None,
+        "thumbnail_width": None,
+        "thumbnails": [],
+        "proxy": None,
+    }
+
+
+def _save_manifest(output_dir: Path, manifest: Dict[str, Any]) -> None:
+    tmp_path = output_dir / f"{MANIFEST_NAME}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, output_dir / MANIFEST_NAME)
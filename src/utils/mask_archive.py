@@ -0,0 +1,279 @@
+"""
+Mask archives: compact storage for the per-frame masks of a propagated video
+
+Consecutive tracked masks of an object are nearly identical, so instead of one
+independent COCO RLE per frame an archive stores, per object, a keyframe RLE
+every `keyframe_interval` masks and the RLE of the XOR with the previous mask
+in between. A delta is only kept when its RLE is shorter than the mask's own:
+for a shape that mostly translates, the XOR (two thin crescents) has more runs
+than the mask, while the mask RLEs of consecutive frames repeat each other and
+zlib removes that redundancy. The masks of an object between two keyframes
+form a chunk that is zlib-compressed as a whole.
+
+Layout (little endian):
+    header   magic "EZMA", version u16, keyframe_interval u16, height u32,
+             width u32, index offset u64
+    chunks   zlib(record*), record = counts length u32 + kind u8 (0 mask,
+             1 XOR with the previous mask) + COCO RLE counts
+    index    chunk count u32, record count u32, zlib(chunks int64[n, 3] +
+             records int64[m, 4]); a chunk row is (object_id, offset, length),
+             a record row is (frame_idx, object_id, chunk, position in chunk)
+
+Frames of an object may be written in any order (propagation runs forward and
+then backward); deltas follow write order and the last write of a frame wins.
+"""
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from pycocotools.mask import decode as decode_masks
+from pycocotools.mask import encode as encode_masks
+
+ARCHIVE_MAGIC = b"EZMA"
+ARCHIVE_VERSION = 1
+HEADER = struct.Struct("<4sHHIIQ")
+RECORD_HEADER = struct.Struct("<IB")
+INDEX_COUNTS = struct.Struct("<II")
+
+RECORD_MASK = 0
+RECORD_DELTA = 1
+
+# Masks per chunk: one keyframe followed by XOR deltas
+DEFAULT_KEYFRAME_INTERVAL = 30
+
+# zlib level for chunks and index; deltas are tiny, so higher levels gain little
+COMPRESSION_LEVEL = 6
+
+# Decoded chunks kept by a reader for random access
+CHUNK_CACHE_SIZE = 64
+
+
+class MaskArchiveWriter:
+    """Write masks into a new archive.
+
+    The archive is written to a temporary file and moved into place by
+    close(), so readers never see a partial archive.
+    """
+
+    def __init__(self, path: Union[str, Path], height: int, width: int,
+                 keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> None:
+        if keyframe_interval < 1:
+            raise ValueError("keyframe_interval must be >= 1")
+        self.path = Path(path)
+        self.height = height
+        self.width = width
+        self.keyframe_interval = keyframe_interval
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, keyframe_interval,
+                                     height, width, 0))
+
+        self._chunks: List[Tuple[int, int, int]] = []
+        self._records: List[Tuple[int, int, int, int]] = []
+        # Per object: (frame indices, (kind, counts) records) of the open chunk and the last mask
+        self._open_chunks: Dict[int, Tuple[List[int], List[Tuple[int, bytes]]]] = {}
+        self._last_masks: Dict[int, np.ndarray] = {}
+
+    def __enter__(self) -> "MaskArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def add(self, frame_idx: int, object_id: int, mask: np.ndarray) -> None:
+        """Add the (H, W) binary mask of an object on a frame."""
+        if mask.shape != (self.height, self.width):
+            raise ValueError(
+                f"mask shape {mask.shape} does not match the archive ({self.height}, {self.width})")
+        mask = np.asfortranarray(mask, dtype=np.uint8)
+
+        frames, encoded = self._open_chunks.setdefault(object_id, ([], []))
+        record = (RECORD_MASK, encode_masks(mask)["counts"])
+        previous = self._last_masks.get(object_id)
+        if previous is not None and encoded:
+            delta = encode_masks(np.bitwise_xor(mask, previous))["counts"]
+            if len(delta) < len(record[1]):
+                record = (RECORD_DELTA, delta)
+        frames.append(frame_idx)
+        encoded.append(record)
+        self._last_masks[object_id] = mask
+
+        if len(encoded) >= self.keyframe_interval:
+            self._flush_chunk(object_id)
+
+    def add_rle(self, frame_idx: int, object_id: int, rle: Dict[str, Any]) -> None:
+        """Add a COCO RLE mask ({"size", "counts"}) as produced by InferenceAPI."""
+        counts = rle["counts"]
+        mask = decode_masks({"size": rle["size"],
+                             "counts": counts.encode() if isinstance(counts, str) else counts})
+        self.add(frame_idx, object_id, mask)
+
+    def close(self) -> Path:
+        """Write the index and move the archive into place.
+
+        Returns:
+            Path: Path of the archive
+        """
+        for object_id in list(self._open_chunks):
+            self._flush_chunk(object_id)
+
+        index_offset = self._file.tell()
+        chunks = np.array(self._chunks, dtype=np.int64).reshape(-1, 3)
+        records = np.array(self._records, dtype=np.int64).reshape(-1, 4)
+        self._file.write(INDEX_COUNTS.pack(len(chunks), len(records)))
+        self._file.write(zlib.compress(chunks.tobytes() + records.tobytes(), COMPRESSION_LEVEL))
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, self.keyframe_interval,
+                                     self.height, self.width, index_offset))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Discard the archive being written."""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _flush_chunk(self, object_id: int) -> None:
+        frames, encoded = self._open_chunks.pop(object_id, ([], []))
+        if not encoded:
+            return
+        data = zlib.compress(
+            b"".join(RECORD_HEADER.pack(len(counts), kind) + counts for kind, counts in encoded),
+            COMPRESSION_LEVEL)
+        chunk_no = len(self._chunks)
+        self._chunks.append((object_id, self._file.tell(), len(data)))
+        self._file.write(data)
+        self._records.extend((frame_idx, object_id, chunk_no, position)
+                             for position, frame_idx in enumerate(frames))
+
+
+class MaskArchiveReader:
+    """Random and sequential access to the masks of an archive.
+
+    Masks are returned as read-only (H, W) uint8 arrays. Reading the frames of
+    an object in write order (as iter_frames does for forward propagations)
+    applies each delta once; a jump decodes from the closest full mask.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        magic, version, self.keyframe_interval, self.height, self.width, index_offset = \
+            HEADER.unpack(self._file.read(HEADER.size))
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError(f"{self.path} is not a version {ARCHIVE_VERSION} mask archive")
+
+        self._file.seek(index_offset)
+        chunk_count, record_count = INDEX_COUNTS.unpack(self._file.read(INDEX_COUNTS.size))
+        index = np.frombuffer(zlib.decompress(self._file.read()), dtype=np.int64)
+        self._chunks = index[:chunk_count * 3].reshape(-1, 3)
+        records = index[chunk_count * 3:].reshape(-1, 4)
+        # Later records win, so re-propagated frames resolve to their last write
+        self._records: Dict[Tuple[int, int], Tuple[int, int]] = {
+            (int(frame_idx), int(object_id)): (int(chunk), int(position))
+            for frame_idx, object_id, chunk, position in records
+        }
+        self._frame_objects: Dict[int, List[int]] = {}
+        for frame_idx, object_id in self._records:
+            self._frame_objects.setdefault(frame_idx, []).append(object_id)
+
+        self._chunk_cache: Dict[int, List[Tuple[int, bytes]]] = {}
+        # Per object: (chunk, position, mask) of the last decoded mask
+        self._cursors: Dict[int, Tuple[int, int, np.ndarray]] = {}
+
+    def __enter__(self) -> "MaskArchiveReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def frames(self) -> List[int]:
+        """Sorted indices of the frames holding at least one mask"""
+        return sorted(self._frame_objects)
+
+    def object_ids(self) -> List[int]:
+        """Sorted IDs of the objects in the archive"""
+        return sorted({int(object_id) for object_id in self._chunks[:, 0]})
+
+    def get_mask(self, frame_idx: int, object_id: int) -> Optional[np.ndarray]:
+        """Mask of an object on a frame, or None if it was not stored"""
+        location = self._records.get((frame_idx, object_id))
+        if location is None:
+            return None
+        chunk_no, position = location
+
+        encoded = self._read_chunk(chunk_no)
+        # Start from the cursor or the closest full mask, whichever is nearer
+        start = position
+        while encoded[start][0] != RECORD_MASK:
+            start -= 1
+        cursor = self._cursors.get(object_id)
+        if cursor is not None and cursor[0] == chunk_no and start <= cursor[1] <= position:
+            _, start, mask = cursor
+            start += 1
+        else:
+            mask = None
+
+        for pos in range(start, position + 1):
+            kind, counts = encoded[pos]
+            if kind == RECORD_MASK:
+                mask = self._decode(counts)
+            else:
+                mask = np.bitwise_xor(mask, self._decode(counts))
+        mask.flags.writeable = False
+        self._cursors[object_id] = (chunk_no, position, mask)
+        return mask
+
+    def get_masks(self, frame_idx: int) -> Dict[int, np.ndarray]:
+        """Masks of all objects stored for a frame, by object ID"""
+        return {object_id: self.get_mask(frame_idx, object_id)
+                for object_id in sorted(self._frame_objects.get(frame_idx, []))}
+
+    def get_rle(self, frame_idx: int, object_id: int) -> Optional[Dict[str, Any]]:
+        """Mask of an object on a frame as COCO RLE, or None if it was not stored"""
+        mask = self.get_mask(frame_idx, object_id)
+        if mask is None:
+            return None
+        rle = encode_masks(np.asfortranarray(mask))
+        return {"size": rle["size"], "counts": rle["counts"].decode()}
+
+    def iter_frames(self) -> Iterator[Tuple[int, Dict[int, np.ndarray]]]:
+        """Decode all frames in order, yielding (frame_idx, {object_id: mask})."""
+        for frame_idx in self.frames():
+            yield frame_idx, self.get_masks(frame_idx)
+
+    def _read_chunk(self, chunk_no: int) -> List[Tuple[int, bytes]]:
+        encoded = self._chunk_cache.get(chunk_no)
+        if encoded is not None:
+            return encoded
+
+        _, offset, length = self._chunks[chunk_no]
+        self._file.seek(int(offset))
+        data = zlib.decompress(self._file.read(int(length)))
+        encoded, pos = [], 0
+        while pos < len(data):
+            size, kind = RECORD_HEADER.unpack_from(data, pos)
+            pos += RECORD_HEADER.size
+            encoded.append((kind, data[pos:pos + size]))
+            pos += size
+
+        if len(self._chunk_cache) >= CHUNK_CACHE_SIZE:
+            self._chunk_cache.pop(next(iter(self._chunk_cache)))
+        self._chunk_cache[chunk_no] = encoded
+        return encoded
+
+    def _decode(self, counts: bytes) -> np.ndarray:
+        return decode_masks({"size": [self.height, self.width], "counts": counts})
@@ -5,17 +5,34 @@ ROOT_DIR = Path(__file__).parent.parent.parent.resolve()
 SRC_DIR = ROOT_DIR / "src"
 ASSETS_DIR = SRC_DIR / "assets"
 UPLOADS_DIR = ASSETS_DIR / "uploads"
+DATASETS_DIR = UPLOADS_DIR / ".datasets"
 
 
 # Resolve paths to specific asset types using video names
+def get_video_path(video_name: str) -> Path:
+    return UPLOADS_DIR / video_name
+
+
 def get_original_frames_path(video_name: str) -> Path:
     return UPLOADS_DIR / video_name / "original_frames"
 
 
+def get_thumbnails_path(video_name: str) -> Path:
+    return UPLOADS_DIR / video_name / "thumbnails"
+
+
+def get_preview_proxy_path(video_name: str) -> Path:
+    return UPLOADS_DIR / video_name / "preview" / f"{video_name}_proxy.mp4"
+
+
 def get_processed_frames_path(video_name: str) -> Path:
     return UPLOADS_DIR / video_name / "processed_frames"
 
 
+def get_mask_archive_path(video_name: str) -> Path:
+    return UPLOADS_DIR / video_name / "masks" / f"{video_name}_masks.ezma"
+
+
 def get_detection_labels_path(video_name: str) -> Path:
     return UPLOADS_DIR / video_name / "detection_labels"
 
@@ -24,5 +41,13 @@ def get_segmentation_labels_path(video_name: str) -> Path:
     return UPLOADS_DIR / video_name / "segmentation_labels"
 
 
+def get_coco_export_path(video_name: str) -> Path:
+    return UPLOADS_DIR / video_name / "segmentation_labels" / f"{video_name}_coco.json"
+
+
 def get_dataset_path(video_name: str) -> Path:
     return UPLOADS_DIR / video_name / "dataset"
+
+
+def get_project_dataset_path(project_id: int) -> Path:
+    return DATASETS_DIR / f"project_{project_id}"
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+from .paths import UPLOADS_DIR
+
+# Probe results by file fingerprint, shared by the web server and CLI workers
+PROBE_CACHE_DIR = UPLOADS_DIR / ".probe_cache"
+
+# Bytes hashed at the start, middle and end of a file for its fingerprint
+FINGERPRINT_SAMPLE_SIZE = 1024 * 1024
+
+
+class VideoMetadata(NamedTuple):
+    """Stream metadata of a video file"""
+    width: int
+    height: int
+    fps: float
+    frame_rate: str  # exact rate as "numerator/denominator"
+    duration: float  # in seconds
+    frame_count: Optional[int]
+    codec: Optional[str]
+
+    def as_video_fields(self) -> Dict[str, Any]:
+        """Fields for DatabaseAPI.create_video"""
+        return {"width": self.width, "height": self.height,
+                "fps": self.fps, "duration": self.duration}
+
+
+_memory_cache: Dict[str, VideoMetadata] = {}
+_memory_cache_lock = Lock()
+
+
+def probe_video(video_path: Union[str, Path], use_cache: bool = True) -> VideoMetadata:
+    """
+    Read the metadata of the first video stream in a single ffprobe call.
+
+    Falls back to OpenCV when ffprobe is not installed. Results are cached in
+    memory and on disk by file fingerprint, so probing the same file again
+    (even under another path) costs only a few small reads.
+
+    Args:
+        video_path: Path to the video file.
+        use_cache: Whether to read and write the probe cache.
+
+    Returns:
+        VideoMetadata of the first video stream.
+
+    Raises:
+        RuntimeError: If the file has no readable video stream.
+    """
+    video_path = Path(video_path)
+    key = file_fingerprint(video_path) if use_cache else None
+
+    if key is not None:
+        with _memory_cache_lock:
+            cached = _memory_cache.get(key)
+        if cached is None:
+            cached = _read_cache(key)
+        if cached is not None:
+            with _memory_cache_lock:
+                _memory_cache[key] = cached
+            return cached
+
+    try:
+        metadata = _probe_with_ffprobe(video_path)
+    except FileNotFoundError:
+        metadata = _probe_with_opencv(video_path)
+
+    if key is not None:
+        with _memory_cache_lock:
+            _memory_cache[key] = metadata
+        _write_cache(key, metadata)
+    return metadata
+
+
+def probe_frame_times(video_path: Union[str, Path]) -> List[float]:
+    """
+    Read the presentation timestamp of every frame of the first video stream.
+
+    Only packets are read (no decoding), and they are sorted into presentation
+    order, so entry n is the timestamp of the n-th decoded frame. Packets
+    without a timestamp are skipped.
+
+    Args:
+        video_path: Path to the video file.
+
+    Returns:
+        Timestamps in seconds, in presentation order.
+
+    Raises:
+        FileNotFoundError: If ffprobe is not installed.
+        RuntimeError: If ffprobe fails.
+    """
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time",
+        "-of",
+        "csv=p=0",
+        str(video_path),
+    ]
+
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(
+            f"ffprobe failed with exit code {e.returncode}") from e
+
+    times = []
+    for line in result.stdout.splitlines():
+        value = line.strip().rstrip(",")
+        try:
+            times.append(float(value))
+        except ValueError:
+            # "N/A" for packets without a timestamp
+            continue
+    return sorted(times)
+
+
+def file_fingerprint(path: Union[str, Path]) -> str:
+    """
+    Hash a file's size and three samples of its content.
+
+    Hashing every byte of a multi-gigabyte video would cost more than probing
+    it, so only the start, middle and end are read. That is enough to tell
+    different videos apart and to notice a file being replaced.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        for offset in (0, max(size // 2 - FINGERPRINT_SAMPLE_SIZE // 2, 0),
+                       max(size - FINGERPRINT_SAMPLE_SIZE, 0)):
+            f.seek(offset)
+            digest.update(f.read(FINGERPRINT_SAMPLE_SIZE))
+    return digest.hexdigest()
+
+
+def _probe_with_ffprobe(video_path: Path) -> VideoMetadata:
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_streams",
+        "-show_format",
+        "-of",
+        "json",
+        str(video_path),
+    ]
+
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(
+            f"ffprobe failed with exit code {e.returncode}") from e
+
+    info = json.loads(result.stdout)
+    streams = info.get("streams") or []
+    if not streams:
+        raise RuntimeError(f"No video stream found in {video_path}")
+    stream = streams[0]
+
+    frame_rate = Fraction(0)
+    for key in ("avg_frame_rate", "r_frame_rate"):
+        numerator, _, denominator = stream.get(key, "0/0").partition("/")
+        if int(numerator or 0) > 0 and int(denominator or 1) > 0:
+            frame_rate = Fraction(int(numerator), int(denominator or 1))
+            break
+
+    duration = float(stream.get("duration") or info.get("format", {}).get("duration") or 0)
+    frame_count = stream.get("nb_frames")
+    if frame_count is not None and str(frame_count).isdigit():
+        frame_count = int(frame_count)
+    elif frame_rate and duration:
+        frame_count = round(duration * frame_rate)
+    else:
+        frame_count = None
+
+    return VideoMetadata(
+        width=int(stream["width"]),
+        height=int(stream["height"]),
+        fps=float(frame_rate),
+        frame_rate=f"{frame_rate.numerator}/{frame_rate.denominator}",
+        duration=duration,
+        frame_count=frame_count,
+        codec=stream.get("codec_name"),
+    )
+
+
+def _probe_with_opencv(video_path: Path) -> VideoMetadata:
+    import cv2
+
+    capture = cv2.VideoCapture(str(video_path))
+    try:
+        if not capture.isOpened():
+            raise RuntimeError(f"No video stream found in {video_path}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    finally:
+        capture.release()
+
+    # OpenCV only reports a float rate; recover common NTSC rates such as 30000/1001
+    frame_rate = Fraction(fps).limit_denominator(1001)
+    return VideoMetadata(
+        width=width,
+        height=height,
+        fps=float(fps),
+        frame_rate=f"{frame_rate.numerator}/{frame_rate.denominator}",
+        duration=frame_count / fps if frame_count and fps else 0.0,
+        frame_count=frame_count,
+        codec=None,
+    )
+
+
+def _read_cache(key: str) -> Optional[VideoMetadata]:
+    try:
+        with open(PROBE_CACHE_DIR / f"{key}.json") as f:
+            return VideoMetadata(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _write_cache(key: str, metadata: VideoMetadata) -> None:
+    try:
+        PROBE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path = PROBE_CACHE_DIR / f"{key}.json"
+        # Unique temp name: several processes may probe the same file at once
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(metadata._asdict(), f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache is an optimization; probing still succeeded
+        pass
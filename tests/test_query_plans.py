@@ -0,0 +1,25 @@
+"""Hot queries must reach their rows through an index (see db.migrations.HOT_QUERIES)."""
+import pytest
+
+from db.migrations import check_query_plans, migrate_database
+from db.session import DATABASE_PATH, DATABASE_PRAGMAS, db
+
+
+@pytest.fixture
+def temp_database(tmp_path):
+    """Point the shared database at a fresh file for the duration of a test."""
+    db.close_all()
+    db.init(str(tmp_path / "easysam.db"), pragmas=DATABASE_PRAGMAS, check_same_thread=False)
+    try:
+        yield db
+    finally:
+        db.close_all()
+        db.init(DATABASE_PATH, pragmas=DATABASE_PRAGMAS, check_same_thread=False)
+
+
+def test_hot_queries_use_indexes(temp_database):
+    migrate_database()
+    results = check_query_plans()
+    assert results
+    failures = {result["name"]: result["plan"] for result in results if not result["ok"]}
+    assert not failures, f"Hot queries scanning a table: {failures}"